@@ -0,0 +1,108 @@
+"""
+ZIC-TALK HR 챗봇 - 시맨틱 답변 캐시
+재작성된 질문의 임베딩을 키로 최종 답변을 저장하여,
+표현만 다른 같은 질문에는 워크플로우 전체를 건너뛰고 즉시 답변합니다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ingest import get_namespace_version
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    """코사인 유사도를 내적으로 계산할 수 있도록 벡터를 정규화"""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    if norm == 0:
+        return array
+    return array / norm
+
+
+class SemanticAnswerCache:
+    """
+    임베딩 유사도 기반 답변 캐시 (LRU 방식으로 용량 제한)
+
+    - 유사도가 threshold 이상인 질문이 있으면 저장된 답변을 반환합니다.
+    - 용량(max_size)을 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    - 네임스페이스가 다시 적재(ingest)되면 버전이 바뀌어 전체가 무효화됩니다.
+    임베딩은 (max_size, 차원) 행렬의 행(slot)에 저장하여, 조회는 행렬-벡터 곱 한 번으로 처리합니다.
+    """
+
+    def __init__(self, namespace: str, threshold: float = 0.92, max_size: int = 256):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()  # slot → 질문·답변 (LRU 순서)
+        self._matrix: Optional[np.ndarray] = None  # 첫 저장 때 임베딩 차원에 맞춰 생성
+        self._used = np.zeros(max_size, dtype=bool)
+        self._version = get_namespace_version(namespace)
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        """모든 항목 제거 (lock 안에서 호출)"""
+        self._entries.clear()
+        self._used[:] = False
+
+    def _check_version(self):
+        """적재 버전이 바뀌었으면 캐시를 비움 (lock 안에서 호출)"""
+        version = get_namespace_version(self.namespace)
+        if version != self._version:
+            if self._entries:
+                print(f"   ♻️  [답변 캐시] '{self.namespace}' 재적재 감지 - 캐시 {len(self._entries)}건 무효화")
+            self._reset()
+            self._version = version
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict]:
+        """가장 유사한 캐시 항목을 찾아 threshold 이상이면 반환"""
+        query = _normalize(embedding)
+        with self._lock:
+            self._check_version()
+
+            if self._entries and self._matrix.shape[1] == query.shape[0]:
+                scores = self._matrix @ query
+                scores[~self._used] = -np.inf
+                best_slot = int(np.argmax(scores))
+                best_score = float(scores[best_slot])
+                if best_score >= self.threshold:
+                    self._entries.move_to_end(best_slot)
+                    self.hits += 1
+                    entry = self._entries[best_slot]
+                    return {"question": entry["question"], "answer": entry["answer"], "score": best_score}
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding: List[float], answer: str):
+        """최종 답변을 캐시에 저장 (용량 초과 시 LRU 제거)"""
+        vector = _normalize(embedding)
+        with self._lock:
+            self._check_version()
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # 임베딩 모델이 바뀌면 차원이 달라지므로 새 행렬로 시작
+                self._reset()
+                self._matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+            if len(self._entries) >= self.max_size:
+                slot, _ = self._entries.popitem(last=False)
+            else:
+                slot = int(np.argmin(self._used))  # 비어 있는 첫 slot
+            self._matrix[slot] = vector
+            self._used[slot] = True
+            self._entries[slot] = {"question": question, "answer": answer}
+
+    def clear(self):
+        """캐시와 통계를 초기화"""
+        with self._lock:
+            self._reset()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """적중/미스 횟수와 현재 크기"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
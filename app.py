@@ -3,10 +3,67 @@ ZIC-TALK HR 챗봇 - Streamlit UI
 대화 맥락을 이해하고 취업규칙 기반 정확한 답변을 제공합니다.
 """
 import streamlit as st
-from graph import run_workflow
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 import json
+import os
+from contextlib import closing
+from typing import Dict, Iterable, Iterator
+from chat_log import ChatLog
+from conversation_memory import ConversationMemory
+
+# ========== 진행 상태 문구 ==========
+# 노드가 끝난 직후 다음 단계를 안내하는 문구
+PROGRESS_LABELS = {
+    "rewrite_question": "⚡ 이전 답변 확인 중...",
+    "lookup_cache": "🔍 관련 규정 검색 중...",
+    "retrieve": "✍️ 답변 작성 중...",
+    "generate": "🔎 팩트체크 중...",
+    "critic": "🔎 팩트체크 완료",
+    "rewrite": "🔎 수정된 답변 재검증 중...",
+}
+
+# 대시보드에 표시할 단계 이름
+NODE_NAMES = {
+    "rewrite_question": "질문 재작성",
+    "lookup_cache": "캐시 조회",
+    "retrieve": "규정 검색",
+    "generate": "초안 작성",
+    "critic": "팩트체크",
+    "rewrite": "답변 수정",
+    "total": "전체",
+}
+
+# ========== 워크플로우 엔진 ==========
+# graph 모듈 import와 클라이언트 생성·그래프 컴파일은 백그라운드에서 한 번만 수행하고,
+# st.cache_resource로 Streamlit 재실행·세션 간에 공유합니다.
+# 화면은 바로 그려지고, 예열이 끝나기 전에 질문하면 그때만 기다립니다.
+def _load_engine():
+    import graph
+    graph.warm_up()
+    return graph
+
+
+@st.cache_resource(show_spinner=False)
+def _engine_future() -> Future:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm-up").submit(_load_engine)
+
+
+def get_engine():
+    """예열된 graph 모듈을 반환 (예열 중이면 완료까지 대기, 실패하면 다음 호출에서 재시도)"""
+    future = _engine_future()
+    try:
+        return future.result()
+    except Exception:
+        _engine_future.clear()
+        raise
+
+
+def engine_ready() -> bool:
+    future = _engine_future()
+    return future.done() and future.exception() is None
+
 
 # ========== 유틸리티 함수 ==========
 def get_timestamp():
@@ -14,35 +71,50 @@ def get_timestamp():
     return datetime.now().strftime("%H:%M")
 
 
-def export_chat_to_txt(messages):
-    """대화 내역을 텍스트로 변환"""
-    lines = []
-    lines.append("=" * 80)
-    lines.append("ZIC-TALK HR 챗봇 대화 내역")
-    lines.append(f"생성 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    lines.append("=" * 80)
-    lines.append("")
+def export_chat_to_txt(messages: Iterable[Dict]) -> Iterator[str]:
+    """대화 내역을 텍스트로 변환 (메시지를 하나씩 읽어 조각 단위로 생성)"""
+    yield "=" * 80 + "\n"
+    yield "ZIC-TALK HR 챗봇 대화 내역\n"
+    yield f"생성 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    yield "=" * 80 + "\n\n"
     
     for i, msg in enumerate(messages, 1):
         role = "👤 사용자" if msg["role"] == "user" else "🤖 AI"
         timestamp = msg.get("timestamp", "")
         
-        lines.append(f"[{i}] {role} ({timestamp})")
-        lines.append("-" * 80)
-        lines.append(msg["content"])
-        lines.append("")
-    
-    return "\n".join(lines)
+        yield f"[{i}] {role} ({timestamp})\n"
+        yield "-" * 80 + "\n"
+        yield msg["content"] + "\n\n"
 
 
-def export_chat_to_json(messages):
-    """대화 내역을 JSON으로 변환"""
-    export_data = {
-        "export_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "total_messages": len(messages),
-        "messages": messages
-    }
-    return json.dumps(export_data, ensure_ascii=False, indent=2)
+def export_chat_to_json(messages: Iterable[Dict], total_messages: int) -> Iterator[str]:
+    """대화 내역을 JSON으로 변환 (메시지를 하나씩 읽어 조각 단위로 생성)"""
+    yield "{\n"
+    yield f'  "export_time": {json.dumps(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))},\n'
+    yield f'  "total_messages": {total_messages},\n'
+    yield '  "messages": ['
+    for i, msg in enumerate(messages):
+        item = json.dumps(msg, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+        yield ("," if i else "") + "\n    " + item
+    yield "\n  ]\n}\n"
+
+
+def write_export(chunks: Iterable[str], path: str) -> str:
+    """
+    내보내기 조각을 파일에 바로 기록 (만드는 동안 대화 전체를 메모리에 문자열로 만들지 않음)
+    세션 파일 옆(소유자 전용 디렉터리)에 쓰며, st.download_button은 이 파일 전체를 메모리에 읽어 전송합니다.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
+
+
+def render_message(msg: Dict):
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+        if "timestamp" in msg:
+            st.caption(f"🕐 {msg['timestamp']}")
 
 
 # ========== 페이지 설정 ==========
@@ -103,12 +175,17 @@ st.markdown('<h1 class="main-title">🤖 ZIC-TALK HR 챗봇</h1>', unsafe_allow_
 st.markdown('<p class="sub-title">🚀 LangGraph 기반 3중 검증 | 대화 맥락 이해 가능</p>', unsafe_allow_html=True)
 
 # ========== 세션 상태 초기화 ==========
-if "messages" not in st.session_state:
-    st.session_state.messages = [{
+# 화면용 대화 내역 - 최근 메시지만 메모리에 두고 전체는 세션 파일에 기록
+if "chat_log" not in st.session_state:
+    st.session_state.chat_log = ChatLog()
+    st.session_state.chat_log.append({
         "role": "assistant",
         "content": "안녕하세요! 👋\n\n저는 **ZIC-TALK HR 챗봇**입니다.\n\n취업규칙에 대해 궁금한 점을 물어보시면, 관련 규정을 검색하고 3중 팩트체크를 거쳐 정확한 답변을 드립니다.\n\n**예시 질문:**\n- 연차는 얼마나 주나요?\n- 퇴직금 계산 방법은?\n- 육아휴직 조건이 어떻게 되나요?\n\n편하게 질문해주세요! 😊",
         "timestamp": get_timestamp()
-    }]
+    })
+
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
 
 if "total_questions" not in st.session_state:
     st.session_state.total_questions = 0
@@ -128,6 +205,30 @@ with st.sidebar:
         elapsed = int(time.time() - st.session_state.start_time)
         st.metric("⏱️ 세션 시간", f"{elapsed//60}분")
     
+    # 답변 캐시 통계 (프로세스 전체 공유) - 엔진 예열이 끝난 뒤부터 표시
+    if engine_ready():
+        engine = get_engine()
+        cache_stats = engine.get_cache_stats()
+        col3, col4 = st.columns(2)
+        with col3:
+            st.metric("⚡ 캐시 적중", cache_stats["hits"])
+        with col4:
+            st.metric("💨 캐시 미스", cache_stats["misses"])
+        
+        # 노드별 지연 시간 (최근 실행 기준 롤링 p50/p95)
+        latency_stats = engine.get_latency_stats()
+        if latency_stats:
+            with st.expander("⏱️ 단계별 처리 시간 (p50 / p95)"):
+                rows = ["| 단계 | p50 | p95 | 횟수 |", "|---|---|---|---|"]
+                for node, stats in latency_stats.items():
+                    rows.append(
+                        f"| {NODE_NAMES.get(node, node)} | {stats['p50'] / 1000:.2f}초 "
+                        f"| {stats['p95'] / 1000:.2f}초 | {stats['count']} |"
+                    )
+                st.markdown("\n".join(rows))
+    else:
+        st.caption("🔥 모델 준비 중...")
+    
     st.markdown("---")
     
     # 기능 안내
@@ -150,11 +251,13 @@ with st.sidebar:
     
     # 대화 초기화 버튼
     if st.button("🗑️ 대화 기록 초기화", use_container_width=True):
-        st.session_state.messages = [{
+        st.session_state.chat_log.clear()
+        st.session_state.chat_log.append({
             "role": "assistant",
             "content": "대화 기록이 초기화되었습니다. 새로운 질문을 시작해주세요! 😊",
             "timestamp": get_timestamp()
-        }]
+        })
+        st.session_state.memory.clear()
         st.session_state.total_questions = 0
         st.session_state.start_time = time.time()
         st.rerun()
@@ -166,33 +269,42 @@ with st.sidebar:
     
     col_export1, col_export2 = st.columns(2)
     
+    chat_log = st.session_state.chat_log
+    
     with col_export1:
         if st.button("📄 TXT", use_container_width=True):
-            if len(st.session_state.messages) > 1:
-                txt_content = export_chat_to_txt(st.session_state.messages)
+            if chat_log.total > 1:
+                # 세션 파일을 한 줄씩 읽어 내보내기 파일로 바로 기록
+                path = write_export(export_chat_to_txt(chat_log.iter_messages()), chat_log.path + ".txt")
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                st.download_button(
-                    label="⬇️ 다운로드",
-                    data=txt_content,
-                    file_name=f"chat_{timestamp}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
+                with open(path, "rb") as f:
+                    st.download_button(
+                        label="⬇️ 다운로드",
+                        data=f,
+                        file_name=f"chat_{timestamp}.txt",
+                        mime="text/plain",
+                        use_container_width=True
+                    )
+                os.remove(path)
             else:
                 st.warning("저장할 대화가 없습니다.")
     
     with col_export2:
         if st.button("📊 JSON", use_container_width=True):
-            if len(st.session_state.messages) > 1:
-                json_content = export_chat_to_json(st.session_state.messages)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                st.download_button(
-                    label="⬇️ 다운로드",
-                    data=json_content,
-                    file_name=f"chat_{timestamp}.json",
-                    mime="application/json",
-                    use_container_width=True
+            if chat_log.total > 1:
+                path = write_export(
+                    export_chat_to_json(chat_log.iter_messages(), chat_log.total), chat_log.path + ".json"
                 )
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                with open(path, "rb") as f:
+                    st.download_button(
+                        label="⬇️ 다운로드",
+                        data=f,
+                        file_name=f"chat_{timestamp}.json",
+                        mime="application/json",
+                        use_container_width=True
+                    )
+                os.remove(path)
             else:
                 st.warning("저장할 대화가 없습니다.")
     
@@ -211,19 +323,30 @@ with st.sidebar:
 # ========== 메인 채팅 영역 ==========
 st.markdown("## 💬 대화창")
 
-# 채팅 메시지 표시
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
-        if "timestamp" in msg:
-            st.caption(f"🕐 {msg['timestamp']}")
+# 채팅 메시지 표시 - 최근 메시지만 그리고, 이전 대화는 펼쳤을 때만 한 페이지씩 파일에서 읽음
+chat_log = st.session_state.chat_log
+if chat_log.older_count:
+    if st.toggle(f"📜 이전 대화 보기 ({chat_log.older_count}개)", key="show_older"):
+        pages = chat_log.page_count()
+        page = pages
+        if pages > 1:
+            page = st.number_input(
+                f"페이지 (1 = 가장 오래된 대화, 전체 {pages}페이지)",
+                min_value=1, max_value=pages, value=pages, key="older_page"
+            )
+        for msg in chat_log.read_page(int(page) - 1):
+            render_message(msg)
+        st.divider()
+
+for msg in chat_log.recent:
+    render_message(msg)
 
 # ========== 사용자 입력 처리 ==========
 if prompt := st.chat_input("질문을 입력하세요... (예: 연차는 얼마나 주나요?)"):
     current_time = get_timestamp()
     
     # 사용자 메시지 추가
-    st.session_state.messages.append({
+    st.session_state.chat_log.append({
         "role": "user",
         "content": prompt,
         "timestamp": current_time
@@ -234,44 +357,71 @@ if prompt := st.chat_input("질문을 입력하세요... (예: 연차는 얼마
         st.markdown(prompt)
         st.caption(f"🕐 {current_time}")
     
-    # AI 답변 생성
+    # AI 답변 생성 (진행 상황과 답변 토큰을 실시간으로 표시)
     with st.chat_message("assistant"):
-        with st.spinner("🔍 규정 검색 및 팩트체크 중... (약 10~15초 소요)"):
-            try:
-                # 대화 기록 준비 (시스템 메시지 제외)
-                chat_history = [
-                    {"role": msg["role"], "content": msg["content"]}
-                    for msg in st.session_state.messages[:-1]
-                    if msg["role"] in ["user", "assistant"]
-                ]
-                
-                # 워크플로우 실행
-                start = time.time()
-                answer = run_workflow(prompt, chat_history)
-                elapsed = time.time() - start
-                
-                # 답변 표시
-                st.markdown(answer)
-                st.caption(f"🕐 {get_timestamp()} | ⏱️ 처리 시간: {elapsed:.1f}초")
-                
-                # 답변 저장
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": answer,
-                    "timestamp": get_timestamp()
-                })
-                
-                # 통계 업데이트
-                st.session_state.total_questions += 1
-                
-            except Exception as e:
-                error_msg = f"❌ 오류가 발생했습니다: {str(e)}\n\n다시 시도해주세요."
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg,
-                    "timestamp": get_timestamp()
-                })
+        status_placeholder = st.empty()
+        answer_placeholder = st.empty()
+        status_placeholder.caption("🔄 질문 이해 중...")
+        
+        try:
+            # 대화 기록 준비 (지난 대화 요약 + 직전 질문·답변만 전달)
+            chat_history = st.session_state.memory.to_history()
+            
+            # 워크플로우 실행 (스트리밍)
+            start = time.time()
+            streamed = ""
+            answer = ""
+            retrieval = None
+            if not engine_ready():
+                status_placeholder.caption("🔥 모델 준비 중...")
+            engine = get_engine()
+            # 직전 턴의 검색 결과를 넘겨 후속 질문이면 검색 없이 재사용
+            memory = st.session_state.memory
+            # Streamlit 재실행으로 중단되면 스트림을 닫아 워크플로우 실행도 멈춤
+            with closing(engine.stream_workflow(prompt, chat_history, memory.last_retrieval)) as events:
+                for event in events:
+                    if event["type"] == "progress":
+                        status_placeholder.caption(PROGRESS_LABELS.get(event["node"], "🔄 처리 중..."))
+                    elif event["type"] == "token":
+                        streamed += event["text"]
+                        answer_placeholder.markdown(streamed + "▌")
+                    elif event["type"] == "reset":
+                        # 팩트체크에서 실패한 초안은 지우고 수정본으로 교체
+                        streamed = ""
+                        answer_placeholder.empty()
+                        status_placeholder.caption(f"🔧 팩트체크 결과를 반영하여 답변 수정 중... ({event['revision']}차)")
+                    elif event["type"] == "done":
+                        answer = event["answer"]
+                        retrieval = event.get("retrieval")
+            elapsed = time.time() - start
+            
+            # 최종 답변 표시
+            status_placeholder.empty()
+            answer_placeholder.markdown(answer)
+            st.caption(f"🕐 {get_timestamp()} | ⏱️ 처리 시간: {elapsed:.1f}초")
+            
+            # 답변 저장
+            st.session_state.chat_log.append({
+                "role": "assistant",
+                "content": answer,
+                "timestamp": get_timestamp()
+            })
+            
+            # 대화 메모리 갱신 (직전 대화를 요약에 접어 넣음)
+            st.session_state.memory.add_exchange(prompt, answer, retrieval)
+            
+            # 통계 업데이트
+            st.session_state.total_questions += 1
+            
+        except Exception as e:
+            status_placeholder.empty()
+            error_msg = f"❌ 오류가 발생했습니다: {str(e)}\n\n다시 시도해주세요."
+            st.error(error_msg)
+            st.session_state.chat_log.append({
+                "role": "assistant",
+                "content": error_msg,
+                "timestamp": get_timestamp()
+            })
 
 # ========== 하단 정보 ==========
 st.markdown("---")
@@ -0,0 +1,471 @@
+"""
+ZIC-TALK HR 챗봇 - 오프라인 벤치마크
+OpenAI/Pinecone 키 없이 워크플로우(graph.py)의 성능을 측정합니다.
+
+- 지연 시간을 설정할 수 있는 가짜 채팅 모델·임베딩 모델을 주입
+- rules.txt를 조항·항/호 청크로 분할하여 인메모리 벡터 인덱스 구성
+- 팩트체크 결과(PASS/FAIL)를 질문별로 스크립트하여 수정 루프까지 재현
+- 골든 질문 세트에 대해 처리량, p50/p99 지연, 질문당 LLM 호출 수를 보고
+- 모든 팩트체크가 FAIL인 최악의 경우(MAX_REVISION_COUNT 도달)도 측정
+
+사용법:
+    python bench.py --iterations 5 --llm-latency 0.05 --output bench_result.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import math
+import random
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import Field, PrivateAttr
+
+# 벤치마크 트레이스는 운영 트레이스와 섞이지 않도록 임시 디렉터리에 기록
+os.environ.setdefault("TRACE_FILE", os.path.join(tempfile.gettempdir(), "zic_talk_bench_trace.jsonl"))
+
+import graph
+from faq_store import FAQStore
+from ingest import build_chunks, parse_rules
+from local_index import LocalVectorIndex
+from hybrid_retriever import BM25Index
+
+# ========== 골든 질문 세트 ==========
+# verdicts: 해당 질문의 n번째 팩트체크 결과 (끝까지 쓰면 마지막 값 반복)
+GOLDEN_QUESTIONS = [
+    {"id": "annual-leave", "question": "연차는 얼마나 주나요?", "verdicts": ["PASS"]},
+    {"id": "retirement", "question": "퇴직 절차는 어떻게 되나요?", "verdicts": ["FAIL", "PASS"]},
+    {"id": "childcare", "question": "육아기 근로시간 단축 조건이 어떻게 되나요?", "verdicts": ["PASS"]},
+    {"id": "sick-leave", "question": "병가는 며칠까지 쓸 수 있나요?", "verdicts": ["PASS"]},
+    {"id": "article-lookup", "question": "제26조 내용을 알려주세요", "verdicts": ["PASS"]},
+    {"id": "discipline", "question": "징계 절차는 어떻게 되나요?", "verdicts": ["FAIL", "FAIL", "PASS"]},
+    {
+        "id": "follow-up",
+        "question": "그럼 월차는?",
+        "history": [
+            {"role": "user", "content": "연차는 얼마나 주나요?"},
+            {"role": "assistant", "content": "제25조에 따라 1년간 80퍼센트 이상 출근하면 15일의 유급휴가를 줍니다."},
+        ],
+        "verdicts": ["PASS"],
+    },
+]
+
+
+# ========== 가짜 모델 ==========
+# 서비스 시간 분포 (latency = 평균)
+# - uniform: latency × (1 ± jitter)      - constant: 항상 latency
+# - exponential: 평균 latency인 지수분포  - lognormal: 평균 latency, 로그 표준편차 jitter(0이면 0.5)인 로그정규분포 (긴 꼬리)
+DISTRIBUTIONS = ("uniform", "constant", "exponential", "lognormal")
+
+
+def _sleep_time(latency: float, jitter: float, rng: random.Random, distribution: str = "uniform") -> float:
+    if latency <= 0:
+        return 0.0
+    if distribution == "constant":
+        return latency
+    if distribution == "exponential":
+        return rng.expovariate(1 / latency)
+    if distribution == "lognormal":
+        sigma = jitter or 0.5
+        return rng.lognormvariate(math.log(latency) - sigma * sigma / 2, sigma)
+    return max(0.0, latency * (1 + rng.uniform(-jitter, jitter)))
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    프롬프트 종류(질문 재작성 / 초안 / 팩트체크 / 답변 수정)를 구분하여
+    결정적인 응답을 돌려주는 가짜 채팅 모델
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    jitter: float = 0.0
+    distribution: str = "uniform"
+    verdicts: Dict[str, List[str]] = Field(default_factory=dict)
+    fail_all: bool = False
+    seed: int = 0
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _rng: Any = PrivateAttr(default=None)
+    _critique_counts: Dict[str, int] = PrivateAttr(default_factory=dict)
+    calls: Dict[str, int] = Field(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "zic-talk-fake-chat"
+
+    # ---------- 응답 생성 ----------
+    def _classify(self, messages: List[BaseMessage]) -> str:
+        system = messages[0].content if messages else ""
+        if system.startswith(graph.REWRITE_SYSTEM_PROMPT[:20]):
+            return "rewrite_question"
+        if system.startswith(graph.CRITIQUE_SYSTEM_PROMPT[:20]):
+            return "critique"
+        if system.startswith("당신은 피드백을 받아"):
+            return "rewrite_answer"
+        return "draft"
+
+    def _respond(self, kind: str, messages: List[BaseMessage]) -> str:
+        human = messages[-1].content
+        if kind == "rewrite_question":
+            question = re.search(r"현재 질문: (.*)", human).group(1).strip()
+            question = re.sub(r"^(그럼|그러면|그건|그거)\s*", "", question)
+            return f"취업규칙에서 {question.rstrip('?')} 관련 규정은 어떻게 되나요?"
+
+        if kind == "critique":
+            question = re.search(r"질문: (.*)", human).group(1).strip()
+            with self._lock:
+                count = self._critique_counts.get(question, 0)
+                self._critique_counts[question] = count + 1
+            if self.fail_all:
+                verdict = "FAIL"
+            else:
+                script = self.verdicts.get(question, ["PASS"])
+                verdict = script[min(count, len(script) - 1)]
+            reason = "없음" if verdict == "PASS" else "조항 번호와 일수를 원문과 다시 대조하세요."
+            return f"평가: {verdict}\n이유: {reason}"
+
+        # 초안 / 수정: 컨텍스트의 첫 조항을 인용하는 답변
+        context = messages[0].content
+        match = re.search(r"\[문서 1\] (제\s?\d+\s?조(?:의\s?\d+)?(?:\([^)]*\))?)", context)
+        citation = match.group(1) if match else "관련 규정"
+        body = "수정된 답변입니다." if kind == "rewrite_answer" else "답변 초안입니다."
+        return f"{citation}에 따르면, 해당 내용은 규정 원문에 명시된 바와 같습니다. {body}"
+
+    def _record(self, kind: str) -> float:
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.calls["total"] = self.calls.get("total", 0) + 1
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            return _sleep_time(self.latency, self.jitter, self._rng, self.distribution)
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        prompt = sum(len(m.content) for m in messages) // 2
+        return {"prompt_tokens": prompt, "completion_tokens": len(text) // 2}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        kind = self._classify(messages)
+        time.sleep(self._record(kind))
+        text = self._respond(kind, messages)
+        message = AIMessage(content=text, response_metadata={"token_usage": self._usage(messages, text)})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        kind = self._classify(messages)
+        await asyncio.sleep(self._record(kind))
+        text = self._respond(kind, messages)
+        message = AIMessage(content=text, response_metadata={"token_usage": self._usage(messages, text)})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        kind = self._classify(messages)
+        time.sleep(self._record(kind))
+        for token in re.findall(r"\S+\s*", self._respond(kind, messages)):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        kind = self._classify(messages)
+        await asyncio.sleep(self._record(kind))
+        for token in re.findall(r"\S+\s*", self._respond(kind, messages)):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    def get_num_tokens_from_messages(self, messages: List[BaseMessage]) -> int:
+        return sum(len(m.content) for m in messages) // 2
+
+    def reset(self):
+        """호출 수·팩트체크 진행 상황 초기화"""
+        with self._lock:
+            self.calls.clear()
+            self._critique_counts.clear()
+
+
+class FakeEmbeddings(Embeddings):
+    """문자 bigram 해시 기반의 결정적 임베딩 (비슷한 문장은 비슷한 벡터)"""
+
+    def __init__(self, dim: int = 256, latency: float = 0.0, jitter: float = 0.0, seed: int = 0,
+                 distribution: str = "uniform"):
+        self.dim = dim
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        compact = re.sub(r"\s+", "", text)
+        for i in range(len(compact) - 1):
+            digest = hashlib.md5(compact[i:i + 2].encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return _sleep_time(self.latency, self.jitter, self._rng, self.distribution)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay())
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._delay())
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay())
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self._delay())
+        return self._vector(text)
+
+
+class DelayedVectorStore:
+    """벡터 검색마다 서비스 시간만큼 기다린 뒤 인메모리 인덱스로 검색 (Pinecone 왕복 시간 재현)"""
+
+    def __init__(self, index: LocalVectorIndex, latency: float, jitter: float = 0.0, seed: int = 0,
+                 distribution: str = "uniform"):
+        self.index = index
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4):
+        with self._lock:
+            self.calls += 1
+            delay = _sleep_time(self.latency, self.jitter, self._rng, self.distribution)
+        time.sleep(delay)
+        return self.index.similarity_search_by_vector_with_score(embedding, k=k)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+# ========== 벤치마크 ==========
+def setup_offline_components(llm_latency: float = 0.0, embed_latency: float = 0.0, jitter: float = 0.0,
+                             token_latency: float = 0.0, seed: int = 0, rules_file: str = "rules.txt",
+                             distribution: str = "uniform", search_latency: float = 0.0):
+    """
+    가짜 모델과 rules.txt 기반 인메모리 인덱스를 워크플로우에 주입
+    distribution은 LLM·임베딩·벡터 검색 지연에 공통으로 쓰는 서비스 시간 분포입니다. (DISTRIBUTIONS)
+    디스크에 저장된 FAQ 답변은 실제 모델로 만든 것이므로 쓰지 않습니다. (모든 질문이 워크플로우를 거침)
+    """
+    articles = parse_rules(rules_file)
+    documents = build_chunks(articles)
+    embeddings = FakeEmbeddings(latency=embed_latency, jitter=jitter, seed=seed, distribution=distribution)
+    vectors = [embeddings._vector(doc.page_content) for doc in documents]
+
+    llm = FakeChatModel(
+        latency=llm_latency,
+        token_latency=token_latency,
+        jitter=jitter,
+        distribution=distribution,
+        seed=seed,
+        verdicts={item["question"]: item["verdicts"] for item in GOLDEN_QUESTIONS},
+    )
+    vector_store = LocalVectorIndex.from_embeddings(documents, vectors, embedding=embeddings)
+    if search_latency > 0:
+        vector_store = DelayedVectorStore(vector_store, search_latency, jitter, seed, distribution)
+    graph.configure_components(
+        llm=llm,
+        embeddings=embeddings,
+        vector_store=vector_store,
+        lexical_index=BM25Index.from_documents(documents),
+        article_store={doc.metadata["article_id"]: doc for doc in articles},
+    )
+    graph.faq_store = FAQStore(namespace=graph.PINECONE_NAMESPACE, enabled=False)
+    return llm, embeddings
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_scenario(name: str, llm: FakeChatModel, embeddings: FakeEmbeddings, iterations: int,
+                 concurrency: int, fail_all: bool = False, use_cache: bool = False,
+                 verifier: Optional[str] = None, policy: Optional[str] = None) -> Dict:
+    """
+    골든 질문 세트를 iterations회 실행하여 지표를 집계
+    verifier / policy를 주면 해당 시나리오 동안 graph.CITATION_VERIFIER / graph.ROUTING_POLICY를 바꿔 실행합니다.
+    """
+    llm.fail_all = fail_all
+    previous_verifier, previous_policy = graph.CITATION_VERIFIER, graph.ROUTING_POLICY
+    if verifier is not None:
+        graph.CITATION_VERIFIER = verifier
+    if policy is not None:
+        graph.ROUTING_POLICY = policy
+    traces: Dict[str, Dict] = {}
+    latencies: Dict[str, List[float]] = {item["id"]: [] for item in GOLDEN_QUESTIONS}
+    trace_lock = threading.Lock()
+
+    def collect(run):
+        with trace_lock:
+            traces[run["trace_id"]] = run
+
+    def ask(item):
+        started = time.perf_counter()
+        graph.run_workflow(item["question"], list(item.get("history", [])))
+        return item["id"], time.perf_counter() - started
+
+    graph.tracer.add_listener(collect)
+    llm.reset()
+    embeddings.calls = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(iterations):
+            if not use_cache:
+                graph.answer_cache.clear()
+                graph.embedding_cache.clear()
+                graph.retrieval_cache.clear()
+            # 한 반복 안에서는 질문별 팩트체크 스크립트를 처음부터 적용
+            llm._critique_counts.clear()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for question_id, elapsed in pool.map(ask, GOLDEN_QUESTIONS):
+                    latencies[question_id].append(elapsed)
+    finally:
+        graph.tracer.remove_listener(collect)
+        graph.CITATION_VERIFIER, graph.ROUTING_POLICY = previous_verifier, previous_policy
+    wall = time.perf_counter() - started
+
+    by_question = {item["question"]: item["id"] for item in GOLDEN_QUESTIONS}
+    per_question = {}
+    for item in GOLDEN_QUESTIONS:
+        runs = [run for run in traces.values() if by_question.get(run["question"]) == item["id"]]
+        per_question[item["id"]] = {
+            "p50_ms": round(_percentile(latencies[item["id"]], 0.5) * 1000, 1),
+            "p99_ms": round(_percentile(latencies[item["id"]], 0.99) * 1000, 1),
+            "llm_calls": round(sum(run["llm_calls"] for run in runs) / max(len(runs), 1), 2),
+            "prompt_tokens": round(sum(run["prompt_tokens"] for run in runs) / max(len(runs), 1)),
+            "max_revisions": max((run.get("revision_count", 0) for run in runs), default=0),
+            "grades": sorted({run.get("grade", "") for run in runs}),
+            "routes": sorted({run.get("route", "") for run in runs}),
+        }
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = len(all_latencies)
+    return {
+        "scenario": name,
+        "questions": total,
+        "wall_s": round(wall, 3),
+        "throughput_qps": round(total / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": round(_percentile(all_latencies, 0.5) * 1000, 1),
+        "p99_ms": round(_percentile(all_latencies, 0.99) * 1000, 1),
+        "llm_calls_per_question": round(llm.calls.get("total", 0) / max(total, 1), 2),
+        "prompt_tokens_per_question": round(sum(run["prompt_tokens"] for run in traces.values()) / max(total, 1)),
+        "llm_calls_by_kind": dict(llm.calls),
+        "embedding_calls": embeddings.calls,
+        "per_question": per_question,
+    }
+
+
+def print_report(result: Dict):
+    print(f"\n📊 [{result['scenario']}] {result['questions']}건 / {result['wall_s']}초")
+    print(f"   처리량: {result['throughput_qps']} q/s | p50: {result['p50_ms']}ms | p99: {result['p99_ms']}ms")
+    print(
+        f"   질문당 LLM 호출: {result['llm_calls_per_question']} | "
+        f"질문당 프롬프트 토큰: {result['prompt_tokens_per_question']} | 임베딩 호출: {result['embedding_calls']}"
+    )
+    print(f"   {'질문':<16}{'p50(ms)':>10}{'p99(ms)':>10}{'LLM':>7}{'토큰':>8}{'수정':>6}  평가 / 경로")
+    for question_id, stats in result["per_question"].items():
+        print(
+            f"   {question_id:<16}{stats['p50_ms']:>10}{stats['p99_ms']:>10}"
+            f"{stats['llm_calls']:>7}{stats['prompt_tokens']:>8}{stats['max_revisions']:>6}  "
+            f"{','.join(stats['grades'])} / {','.join(stats['routes'])}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ZIC-TALK 오프라인 벤치마크")
+    parser.add_argument("--iterations", type=int, default=3, help="골든 세트 반복 횟수")
+    parser.add_argument("--concurrency", type=int, default=1, help="동시에 처리할 질문 수")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 호출당 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="스트리밍 토큰당 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="임베딩 호출당 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="벡터 검색당 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 변동 비율 (0.2 = ±20%%)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform", help="서비스 시간 분포")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--use-cache", action="store_true", help="반복 사이에 답변·임베딩·검색 캐시를 비우지 않음")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (CI 추적용)")
+    args = parser.parse_args(argv)
+
+    llm, embeddings = setup_offline_components(
+        llm_latency=args.llm_latency,
+        embed_latency=args.embed_latency,
+        jitter=args.jitter,
+        token_latency=args.token_latency,
+        seed=args.seed,
+        distribution=args.distribution,
+        search_latency=args.search_latency,
+    )
+
+    # 노드 로그(print)는 벤치마크 출력과 섞이지 않도록 숨김
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    try:
+        results = [
+            run_scenario("golden", llm, embeddings, args.iterations, args.concurrency, use_cache=args.use_cache),
+            # 가짜 초안은 규칙 검증을 통과하므로, LLM 팩트체크가 항상 실행되도록 자동 PASS는 끄고
+            # 모든 질문이 MAX_REVISION_COUNT까지 수정하도록 경로 선택도 끔
+            run_scenario("worst-case", llm, embeddings, args.iterations, args.concurrency, fail_all=True,
+                         use_cache=args.use_cache, verifier="fail", policy="fixed"),
+        ]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    for result in results:
+        print_report(result)
+
+    # 최악의 경우에도 수정 루프는 MAX_REVISION_COUNT에서 멈춰야 함
+    worst = results[1]
+    loop_ok = all(
+        stats["max_revisions"] == graph.MAX_REVISION_COUNT and stats["grades"] == ["FAIL"]
+        for stats in worst["per_question"].values()
+    )
+    print(f"\n{'✅' if loop_ok else '❌'} 최악의 경우 수정 루프 상한 (MAX_REVISION_COUNT={graph.MAX_REVISION_COUNT})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": vars(args),
+                "max_revision_count": graph.MAX_REVISION_COUNT,
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+    return 0 if loop_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+ZIC-TALK HR 챗봇 - 화면용 대화 내역 저장소 (Streamlit 세션별)
+최근 메시지 몇 개만 메모리에 두고, 모든 메시지는 세션별 로컬 JSONL 파일에 추가 기록합니다.
+화면은 최근 메시지만 그리고, 이전 대화는 페이지 단위로 파일에서 읽으며,
+TXT/JSON 내보내기 파일도 세션 파일을 한 줄씩 읽어 만들므로 대화가 길어져도 세션당 메모리가 일정합니다.
+(단, Streamlit 다운로드 버튼은 내보내기 파일 전체를 메모리에 읽어 전송합니다.)
+인사 상담 내용이 담기므로 디렉터리는 0o700, 세션 파일은 0o600 권한으로 만들어 다른 로컬 사용자가 읽지 못하게 합니다.
+(워크플로우에 넘기는 대화 기록은 conversation_memory.py가 따로 관리합니다.)
+"""
+import os
+import json
+import time
+import uuid
+import tempfile
+import weakref
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+CHAT_LOG_DIR = os.getenv("CHAT_LOG_DIR", os.path.join(tempfile.gettempdir(), "zic_talk_chats"))
+CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "20"))
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "20"))
+CHAT_LOG_TTL = float(os.getenv("CHAT_LOG_TTL", str(24 * 3600)))
+
+# 이 프로세스에서 아직 사용 중인 ChatLog의 파일 (오래 입력이 없어도 정리하지 않음)
+_live_paths = set()
+_live_lock = threading.Lock()
+
+
+def _open_private(path: str, flags: int):
+    """소유자만 읽고 쓸 수 있는(0o600) 파일을 바이너리 모드로 열기"""
+    return os.fdopen(os.open(path, flags, 0o600), "wb")
+
+
+def _prepare_directory(directory: str):
+    """소유자 전용(0o700) 디렉터리 생성 (이미 있으면 권한을 좁힘, 다른 사용자의 디렉터리면 PermissionError)"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if os.name == "posix":
+        os.chmod(directory, 0o700)
+
+
+def _release(path: str):
+    with _live_lock:
+        _live_paths.discard(path)
+
+
+def _prune(directory: str, ttl: float):
+    """ttl보다 오래 수정되지 않은 세션 파일 삭제 (브라우저를 닫아 끝난 세션, 사용 중인 세션은 제외)"""
+    now = time.time()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    with _live_lock:
+        live = set(_live_paths)
+    for name in names:
+        path = os.path.join(directory, name)
+        if path in live:
+            continue
+        try:
+            if now - os.path.getmtime(path) > ttl:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class ChatLog:
+    """
+    세션 하나의 대화 내역
+
+    - recent: 최근 메시지 (최대 recent_size개, 화면에 바로 표시)
+    - read_page(): recent에 없는 이전 메시지를 page_size개씩 파일에서 읽음
+    - iter_messages(): 처음부터 모든 메시지를 파일에서 한 줄씩 읽음 (내보내기용)
+    페이지 시작 위치(바이트 오프셋)만 기억하므로 이전 메시지를 읽을 때 파일 전체를 훑지 않습니다.
+    파일이 외부에서 지워지거나 잘리면 메모리에 남은 최근 메시지로 파일을 다시 만들고 페이지 정보를 초기화합니다.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, directory: str = CHAT_LOG_DIR,
+                 recent_size: int = CHAT_RECENT_MESSAGES, page_size: int = CHAT_PAGE_SIZE):
+        _prepare_directory(directory)
+        _prune(directory, CHAT_LOG_TTL)
+        self.session_id = session_id or uuid.uuid4().hex
+        self.path = os.path.join(directory, f"{self.session_id}.jsonl")
+        self.page_size = page_size
+        self.recent: deque = deque(maxlen=recent_size)
+        self.total = 0
+        self._page_offsets: List[int] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        with _live_lock:
+            _live_paths.add(self.path)
+        # 세션이 끝나 ChatLog가 회수되면 파일을 정리 대상으로 되돌림
+        weakref.finalize(self, _release, self.path)
+
+    def _write(self, f, message: Dict):
+        """파일에 한 줄 기록하고 페이지 위치 갱신 (lock 안에서 호출)"""
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        f.write(data)
+        if self.total % self.page_size == 0:
+            self._page_offsets.append(self._size)
+        self._size += len(data)
+        self.total += 1
+
+    def _recover(self):
+        """
+        기록한 크기만큼 파일이 남아 있는지 확인 (lock 안에서 호출)
+        지워졌거나 잘렸으면 최근 메시지만으로 파일과 페이지 정보를 다시 만듦 (이전 메시지는 잃음)
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size >= self._size:
+            return
+        self.total = 0
+        self._page_offsets = []
+        self._size = 0
+        with _open_private(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC) as f:
+            for message in self.recent:
+                self._write(f, message)
+
+    def append(self, message: Dict):
+        """메시지 추가 (파일에 기록하고 최근 메시지에 넣음)"""
+        with self._lock:
+            self._recover()
+            with _open_private(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND) as f:
+                self._write(f, message)
+            self.recent.append(message)
+
+    @property
+    def older_count(self) -> int:
+        """최근 메시지 창 밖의 이전 메시지 수"""
+        return self.total - len(self.recent)
+
+    def page_count(self) -> int:
+        return -(-self.older_count // self.page_size)
+
+    def read_page(self, page: int) -> List[Dict]:
+        """이전 메시지 page번째 묶음 (0부터, 오래된 순 / 최근 메시지 창에 있는 메시지는 제외)"""
+        with self._lock:
+            self._recover()
+            start = page * self.page_size
+            end = min(start + self.page_size, self.older_count)
+            if page < 0 or start >= end:
+                return []
+            offset = self._page_offsets[page]
+        messages = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for _ in range(end - start):
+                    messages.append(json.loads(f.readline()))
+        except (FileNotFoundError, ValueError):
+            # 읽는 도중 파일이 지워지거나 바뀜 (다음 호출에서 다시 만듦)
+            return []
+        return messages
+
+    def iter_messages(self) -> Iterator[Dict]:
+        """모든 메시지를 오래된 순으로 (읽는 도중 추가된 메시지는 제외)"""
+        with self._lock:
+            self._recover()
+            total = self.total
+        if not total or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                if index >= total:
+                    return
+                yield json.loads(line)
+
+    def clear(self):
+        """대화 내역 삭제 (세션 파일도 삭제)"""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.recent.clear()
+            self.total = 0
+            self._page_offsets = []
+            self._size = 0
@@ -0,0 +1,129 @@
+"""
+ZIC-TALK HR 챗봇 - 규칙 기반 인용 검증
+LLM 팩트체크 전에 답변의 조항 번호와 숫자(일수, 개월, 퍼센트 등)가
+검색된 규정 원문에 실제로 있는지 확인합니다.
+검색되지 않은 조항 인용은 LLM 호출 없이 바로 FAIL 처리하고, 근거가 확실한 답변은 LLM 팩트체크를 생략할 수 있습니다.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from hybrid_retriever import ARTICLE_REFERENCE_PATTERN, article_key
+
+# 숫자 + 단위 (예: 15일, 3개월, 80퍼센트, 1일 2회)
+NUMERIC_CLAIM_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s?(개월|시간|퍼센트|%|일|년|분|세|회|주|원|배)")
+UNIT_ALIASES = {"%": ["%", "퍼센트"], "퍼센트": ["퍼센트", "%"], "개월": ["개월", "월"]}
+NOT_IN_RULES_PATTERN = re.compile(r"규정에\s?(명시되어\s?있지\s?않|없)")
+# 조항 원문을 이어 붙일 때의 구분자 (공백을 지운 뒤에도 앞 조항 끝의 숫자·마침표와 붙지 않도록)
+EVIDENCE_SEPARATOR = " | "
+
+PASS = "PASS"
+FAIL = "FAIL"
+UNSURE = "UNSURE"
+
+
+def _article_keys(text: str) -> List[str]:
+    keys = []
+    for match in ARTICLE_REFERENCE_PATTERN.finditer(text):
+        key = f"제{match.group(1)}조" + (f"의{match.group(2)}" if match.group(2) else "")
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+def _numeric_claims(text: str) -> List[Dict[str, str]]:
+    claims = []
+    for match in NUMERIC_CLAIM_PATTERN.finditer(text):
+        claim = {"number": match.group(1), "unit": match.group(2), "text": match.group(0)}
+        if claim not in claims:
+            claims.append(claim)
+    return claims
+
+
+def _compact_citations(answer: str) -> str:
+    """조항 번호(제25조 제1항 등)의 숫자는 숫자 주장에서 제외"""
+    return re.sub(r"제\s?\d+\s?(조|항|호|장|절)(의\s?\d+)?", " ", answer)
+
+
+def _claim_supported(claim: Dict[str, str], evidence: str) -> bool:
+    number, unit = claim["number"], claim["unit"]
+    for alias in UNIT_ALIASES.get(unit, [unit]):
+        # 앞 숫자에 붙은 경우(예: 115일 안의 15일)는 제외
+        if re.search(rf"(?<![\d.]){re.escape(number)}{re.escape(alias)}", evidence):
+            return True
+    # 80% ↔ 100분의 80
+    return unit in UNIT_ALIASES and f"100분의{number}" in evidence
+
+
+def verify_citations(answer: str, sources: List[Dict[str, str]],
+                     documents: Optional[List[Dict[str, Any]]] = None) -> Dict:
+    """
+    답변의 인용 조항·숫자를 검색된 조항과 대조
+
+    Args:
+        sources: 프롬프트에 넣은 조항 (토큰 예산에 맞춰 줄인 본문)
+        documents: 줄이기 전의 검색된 조항 원문 [{"page_content", "metadata"}, ...]
+            주어지면 숫자·조항 언급은 원문 전체와 대조합니다. (생략된 항을 인용한 올바른 답변을 FAIL로 보지 않도록)
+
+    Returns:
+        {
+            "verdict": "PASS" | "FAIL" | "UNSURE",
+            "reasons": [문제점, ...],
+            "citations": 답변이 인용한 조항 키 목록,
+            "unknown_citations": 검색 결과에 없는 조항,
+            "unsupported_numbers": 인용한 조항 원문에서 찾지 못한 숫자 표현,
+        }
+        PASS는 인용 조항이 있고 모든 인용·숫자가 원문과 일치하는 경우,
+        FAIL은 검색 결과에 없는 조항을 인용한 경우,
+        UNSURE는 규칙만으로 판단할 근거가 부족한 경우(LLM 팩트체크 필요)입니다.
+        원문에 없는 숫자는 계산한 값(예: 15일 + 1일)일 수 있으므로 FAIL이 아니라 UNSURE로 봅니다.
+    """
+    citations = _article_keys(answer)
+    if documents:
+        articles = [(article_key(doc["metadata"].get("article_title", "")), doc["page_content"]) for doc in documents]
+    else:
+        articles = [(source.get("key"), source["text"]) for source in sources]
+    known = {key for key, _ in articles if key}
+    # 조항 본문이 다른 조항을 언급하는 경우(예: "제24조의 휴게시간")도 원문에 있는 것으로 인정
+    for _, text in articles:
+        known.update(_article_keys(text))
+    unknown = [key for key in citations if key not in known]
+
+    # 숫자는 답변이 인용한 조항의 원문과만 대조 (질문에 나온 숫자를 그대로 옮긴 답변을 통과시키지 않도록)
+    texts = [text for key, text in articles if key in citations] or [text for _, text in articles]
+    evidence = _compact(EVIDENCE_SEPARATOR.join(texts))
+    unsupported = [
+        claim["text"] for claim in _numeric_claims(_compact_citations(answer))
+        if not _claim_supported(claim, evidence)
+    ]
+
+    reasons = []
+    if unknown:
+        reasons.append(f"검색된 규정에 없는 조항을 인용했습니다: {', '.join(unknown)}")
+    if unsupported:
+        reasons.append(f"인용한 조항 원문에서 찾을 수 없는 숫자가 있습니다: {', '.join(unsupported)}")
+
+    if unknown:
+        verdict = FAIL
+    elif citations and not unsupported and not NOT_IN_RULES_PATTERN.search(answer):
+        verdict = PASS
+    else:
+        verdict = UNSURE
+
+    return {
+        "verdict": verdict,
+        "reasons": reasons,
+        "citations": citations,
+        "unknown_citations": unknown,
+        "unsupported_numbers": unsupported,
+    }
+
+
+def format_critique(result: Dict) -> str:
+    """LLM 팩트체크와 같은 형식의 피드백 문자열 (답변 수정 프롬프트에 그대로 사용)"""
+    if result["verdict"] == FAIL:
+        return f"평가: FAIL\n이유: [자동 검증] {' / '.join(result['reasons'])}"
+    return f"평가: PASS\n이유: [자동 검증] 인용 조항({', '.join(result['citations'])})과 숫자가 규정 원문과 일치합니다."
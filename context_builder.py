@@ -0,0 +1,170 @@
+"""
+ZIC-TALK HR 챗봇 - 토큰 예산 기반 컨텍스트 구성
+검색된 조항을 중복 제거하고, 토큰 예산을 넘으면 긴 조항을 질문과 관련된 항/호 위주로 줄입니다.
+팩트체크·답변 수정 단계에는 답변이 실제로 인용한 조항만 넘겨 프롬프트를 작게 유지합니다.
+"""
+import math
+import re
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+from hybrid_retriever import ARTICLE_REFERENCE_PATTERN, article_key, char_ngrams, document_key
+
+# 한국어 본문 기준 대략 1.5글자 ≈ 1토큰 (정확한 값이 아니라 예산 배분용 추정치)
+CHARS_PER_TOKEN = 1.5
+TITLE_PATTERN = re.compile(r"제\s?\d+\s?조(?:의\s?\d+)?(?:\s*\([^)]*\))?")
+PARAGRAPH_PATTERN = re.compile(r"^[①-⑳]")  # ①~⑳ 항
+OMITTED = "  …(생략)"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def short_title(title: str) -> str:
+    """'제25조(연차유급휴가) ①1년간...' → '제25조(연차유급휴가)'"""
+    match = TITLE_PATTERN.match(title.strip())
+    return match.group(0) if match else title.strip()[:30]
+
+
+def dedupe_documents(docs: List[Document]) -> List[Document]:
+    """같은 조항이거나 다른 청크에 내용이 그대로 포함된 청크를 제거 (검색 순서 유지)"""
+    kept: List[Document] = []
+    seen = set()
+    for doc in docs:
+        key = document_key(doc)
+        content = doc.page_content.strip()
+        if key in seen or any(content in other.page_content for other in kept):
+            continue
+        # 먼저 들어온 짧은 청크가 이번 청크에 포함되면 긴 쪽으로 교체
+        kept = [other for other in kept if other.page_content.strip() not in content]
+        kept.append(doc)
+        seen.add(key)
+    return kept
+
+
+# ========== 조항 줄이기 ==========
+def split_clauses(content: str) -> List[Dict]:
+    """
+    조항 본문을 항/호(줄) 단위로 분할
+    첫 줄(조항 제목)은 항상 0번, 나머지 줄은 자신이 속한 항(parent)을 가리킵니다.
+    """
+    units: List[Dict] = []
+    parent = 0
+    for line in content.split("\n"):
+        text = line.strip()
+        if not text:
+            continue
+        if not units:
+            units.append({"text": line.rstrip(), "parent": None})
+        elif PARAGRAPH_PATTERN.match(text):
+            parent = len(units)
+            units.append({"text": line.rstrip(), "parent": None})
+        else:
+            # 호(1. 2.)와 목·줄바꿈된 문장은 한 줄씩 직전 항에 딸린 단위로 취급
+            units.append({"text": line.rstrip(), "parent": parent})
+    return units
+
+
+def trim_article(content: str, question: str, max_tokens: int) -> str:
+    """
+    질문과 겹치는 표현이 많은 항/호부터 예산이 찰 때까지 남기고 나머지는 생략 표시
+    겹치는 표현이 없는 항/호도 예산이 남으면 포함합니다. (같은 점수는 본문 순서대로)
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return content
+
+    units = split_clauses(content)
+    header = units[0]["text"]
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(header) >= max_chars:
+        return header[:max_chars] + OMITTED
+
+    query_terms = set(char_ngrams(question))
+    scores = [len(query_terms & set(char_ngrams(unit["text"]))) for unit in units]
+
+    # 줄바꿈과 생략 표시도 예산에 포함
+    selected = {0}
+    used = estimate_tokens(header + "\n" + OMITTED)
+    for i in sorted(range(1, len(units)), key=lambda i: scores[i], reverse=True):
+        needed = [j for j in (units[i]["parent"], i) if j is not None and j not in selected]
+        cost = sum(estimate_tokens("\n" + units[j]["text"]) for j in needed)
+        if used + cost > max_tokens:
+            continue
+        selected.update(needed)
+        used += cost
+
+    lines = []
+    for i, unit in enumerate(units):
+        if i in selected:
+            lines.append(unit["text"])
+        elif not lines or lines[-1] != OMITTED:
+            lines.append(OMITTED)
+    return "\n".join(lines)
+
+
+def _allocate_budget(sizes: List[int], budget: int) -> List[int]:
+    """짧은 조항은 그대로 두고 남은 예산을 긴 조항끼리 나눔"""
+    limits = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for n, i in enumerate(order):
+        share = remaining // (len(sizes) - n)
+        limits[i] = min(sizes[i], share)
+        remaining -= limits[i]
+    return limits
+
+
+# ========== 컨텍스트 ==========
+def build_sources(question: str, docs: List[Document], budget: int) -> List[Dict[str, str]]:
+    """
+    검색 결과를 프롬프트용 조항 목록으로 변환
+
+    Returns:
+        [{"title": "제25조(연차유급휴가)", "key": "제25조", "text": 본문}, ...]
+    """
+    docs = dedupe_documents(docs)
+    sizes = [estimate_tokens(doc.page_content) for doc in docs]
+    limits = _allocate_budget(sizes, budget) if sum(sizes) > budget else sizes
+    texts = [trim_article(doc.page_content, question, limit) for doc, limit in zip(docs, limits)]
+
+    # 줄인 결과가 배분량보다 작으면 남은 예산을 줄어든 조항에 검색 순서대로 다시 나눔
+    spare = sum(max(0, limit - estimate_tokens(text)) for limit, text in zip(limits, texts))
+    for i, doc in enumerate(docs):
+        if spare <= 0:
+            break
+        if texts[i] == doc.page_content:
+            continue
+        before = estimate_tokens(texts[i])
+        texts[i] = trim_article(doc.page_content, question, before + spare)
+        spare -= max(0, estimate_tokens(texts[i]) - before)
+
+    sources = []
+    for doc, text in zip(docs, texts):
+        title = doc.metadata.get("article_title", "Unknown")
+        sources.append({
+            "title": short_title(title),
+            "key": article_key(title),
+            "text": text,
+        })
+    return sources
+
+
+def format_context(sources: List[Dict[str, str]]) -> str:
+    return "\n\n---\n\n".join(
+        f"[문서 {i}] {source['title']}\n{source['text']}" for i, source in enumerate(sources, 1)
+    )
+
+
+def cited_sources(text: str, sources: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    답변(또는 피드백)이 인용한 조항만 반환
+    인용한 조항을 찾지 못하면 판단 근거가 없으므로 전체를 반환합니다.
+    """
+    keys = {
+        f"제{match.group(1)}조" + (f"의{match.group(2)}" if match.group(2) else "")
+        for match in ARTICLE_REFERENCE_PATTERN.finditer(text)
+    }
+    cited = [source for source in sources if source["key"] in keys]
+    return cited or sources
@@ -0,0 +1,88 @@
+"""
+ZIC-TALK HR 챗봇 - 대화 메모리
+대화 전체를 매번 다시 보내는 대신, 지난 대화의 짧은 요약과 직전 질문·답변 한 쌍만 유지합니다.
+턴마다 요약을 제자리에서 갱신하므로 대화가 길어져도 프롬프트 크기가 거의 일정합니다.
+(요약은 LLM 호출 없이 질문과 답변이 인용한 조항으로 만듭니다.)
+직전 턴의 검색 결과(조항 원문·질문 임베딩)도 함께 보관하여 후속 질문에서 검색을 다시 하지 않도록 합니다.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from hybrid_retriever import article_key, ARTICLE_REFERENCE_PATTERN
+
+SUMMARY_MAX_ITEMS = int(os.getenv("SUMMARY_MAX_ITEMS", "6"))
+LAST_ANSWER_MAX_CHARS = int(os.getenv("LAST_ANSWER_MAX_CHARS", "600"))
+SUMMARY_ROLE = "summary"
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def summarize_exchange(question: str, answer: str) -> str:
+    """질문·답변 한 쌍을 요약 한 줄로 ('연차는 얼마나 주나요? → 제25조')"""
+    cited = []
+    for match in ARTICLE_REFERENCE_PATTERN.finditer(answer):
+        key = article_key(match.group(0))
+        if key not in cited:
+            cited.append(key)
+    topic = ", ".join(cited[:3]) if cited else _shorten(answer, 40)
+    return f"{_shorten(question, 60)} → {topic}"
+
+
+class ConversationMemory:
+    """
+    요약 + 직전 대화 한 쌍
+
+    - add_exchange(): 직전 대화를 요약에 접어 넣고 새 대화를 직전 대화로 보관
+    - to_history(): 노드에 넘길 대화 기록 (요약 1개 + 사용자·AI 메시지 2개 이하)
+    - last_retrieval: 직전 검색 결과 (graph의 previous_retrieval로 전달)
+    """
+
+    def __init__(self, max_items: int = SUMMARY_MAX_ITEMS, last_answer_max_chars: int = LAST_ANSWER_MAX_CHARS):
+        self.max_items = max_items
+        self.last_answer_max_chars = last_answer_max_chars
+        self.summary: List[str] = []
+        self.last_exchange: List[Dict[str, str]] = []
+        self.last_retrieval: Optional[Dict[str, Any]] = None
+        self.turns = 0
+
+    def add_exchange(self, question: str, answer: str, retrieval: Optional[Dict[str, Any]] = None):
+        """retrieval이 None이면(캐시·FAQ 답변처럼 검색하지 않은 턴) 직전 검색 결과를 유지"""
+        if len(self.last_exchange) == 2:
+            self.summary.append(summarize_exchange(self.last_exchange[0]["content"], self.last_exchange[1]["content"]))
+            del self.summary[:-self.max_items]
+        self.last_exchange = [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": _shorten(answer, self.last_answer_max_chars)},
+        ]
+        if retrieval is not None:
+            self.last_retrieval = retrieval
+        self.turns += 1
+
+    def to_history(self) -> List[Dict[str, str]]:
+        history = []
+        if self.summary:
+            history.append({"role": SUMMARY_ROLE, "content": "\n".join(f"- {item}" for item in self.summary)})
+        return history + list(self.last_exchange)
+
+    def clear(self):
+        self.summary = []
+        self.last_exchange = []
+        self.last_retrieval = None
+        self.turns = 0
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, str]], **kwargs) -> "ConversationMemory":
+        """전체 대화 기록(사용자·AI 메시지 목록)으로 메모리를 구성"""
+        memory = cls(**kwargs)
+        question = None
+        for message in messages:
+            if message["role"] == "user":
+                question = message["content"]
+            elif message["role"] == "assistant" and question is not None:
+                memory.add_exchange(question, message["content"])
+                question = None
+        return memory
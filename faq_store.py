@@ -0,0 +1,209 @@
+"""
+ZIC-TALK HR 챗봇 - 사전 생성 FAQ 답변
+자주 묻는 질문(faq.json)은 미리 전체 워크플로우(Draft-Critic-Rewrite)로 답변을 만들어 두고,
+질문이 FAQ와 거의 같으면 그래프를 실행하지 않고 바로 답변합니다.
+검증을 통과한 답변만 인용 조항·적재 버전과 함께 저장하며,
+ingest.py가 인용 조항의 변경을 감지하면 해당 FAQ만 다시 생성합니다.
+
+사용법:
+    python faq_store.py              # faq.json 전체 생성
+    python faq_store.py annual-leave # 특정 FAQ만 다시 생성
+"""
+import os
+import re
+import sys
+import json
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from ingest import INDEX_DIR, NAMESPACE, _read_json, _write_json, article_id, get_namespace_version
+from hybrid_retriever import char_ngrams
+from context_builder import cited_sources
+
+FAQ_FILE = os.getenv("FAQ_FILE", "faq.json")
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.8"))
+
+
+def store_path(namespace: str = NAMESPACE) -> str:
+    """네임스페이스별 FAQ 답변 저장 경로"""
+    return os.path.join(INDEX_DIR, namespace, "faq_answers.json")
+
+
+def load_faq_entries(file_path: str = FAQ_FILE) -> List[Dict]:
+    """큐레이션된 FAQ 목록 [{"id", "question", "keywords", "aliases"}, ...] (없으면 빈 목록)"""
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _bigrams(text: str) -> set:
+    """공백·문장부호를 무시한 문자 bigram 집합"""
+    return set(char_ngrams(re.sub(r"[^가-힣A-Za-z0-9]", "", text)))
+
+
+def similarity(a: str, b: str) -> float:
+    """두 질문의 문자 bigram Dice 계수 (0~1)"""
+    left, right = _bigrams(a), _bigrams(b)
+    if not left or not right:
+        return 0.0
+    return 2 * len(left & right) / (len(left) + len(right))
+
+
+class FAQStore:
+    """
+    사전 생성된 FAQ 답변 조회
+
+    - 질문과 FAQ 질문(또는 별칭)의 유사도가 threshold 이상이면 저장된 답변을 반환합니다.
+    - keywords가 있는 FAQ는 질문에 그중 하나가 들어 있어야 합니다. ("병가는 얼마나 주나요?"가
+      "연차는 얼마나 주나요?"와 어미만 같아서 적중하지 않도록)
+    - 답변을 만든 시점의 적재 버전이 현재 버전과 다르면 제공하지 않습니다.
+    - 저장 파일이 바뀌면(다른 프로세스의 재생성) 다음 조회 때 다시 읽습니다.
+    - enabled=False이면 저장 파일을 읽지 않고 항상 None을 반환합니다. (가짜 모델로 돌리는 벤치마크용)
+    """
+
+    def __init__(self, namespace: str = NAMESPACE, threshold: float = FAQ_MATCH_THRESHOLD, enabled: bool = True):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.enabled = enabled
+        self.path = store_path(namespace)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        """저장 파일이 바뀌었으면 다시 읽음 (lock 안에서 호출)"""
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime != self._mtime:
+            self._entries = _read_json(self.path, {}).get("entries", {})
+            self._mtime = mtime
+
+    def match(self, question: str) -> Optional[Dict]:
+        """가장 비슷한 FAQ를 찾아 threshold 이상이고 현재 버전이면 반환"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._reload()
+            if not self._entries:
+                return None
+
+            version = get_namespace_version(self.namespace)
+            best, best_score = None, 0.0
+            for faq_id, entry in self._entries.items():
+                if entry.get("version") != version:
+                    continue
+                keywords = entry.get("keywords")
+                if keywords and not any(keyword in question for keyword in keywords):
+                    continue
+                score = max(similarity(question, text) for text in [entry["question"], *entry.get("aliases", [])])
+                if score > best_score:
+                    best, best_score = {"id": faq_id, **entry}, score
+
+            if best is not None and best_score >= self.threshold:
+                self.hits += 1
+                return {**best, "score": best_score}
+
+            self.misses += 1
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """적중/미스 횟수와 현재 크기"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# ========== 사전 생성 ==========
+def build_faq_answers(faq_ids: Iterable[str] = None, file_path: str = FAQ_FILE,
+                      namespace: str = NAMESPACE) -> Dict[str, int]:
+    """
+    FAQ 질문마다 전체 워크플로우(Draft-Critic-Rewrite, ROUTING_POLICY=fixed)를 실행하여 검증을 통과한 답변을 저장
+
+    Args:
+        faq_ids: 다시 만들 FAQ ID (None이면 전체)
+
+    Returns:
+        {"built": 저장한 개수, "skipped": 검증 실패 등으로 제외한 개수}
+    """
+    import graph
+
+    wanted = set(faq_ids) if faq_ids is not None else None
+    entries = [entry for entry in load_faq_entries(file_path) if wanted is None or entry["id"] in wanted]
+
+    path = store_path(namespace)
+    store = _read_json(path, {"entries": {}})
+    version = get_namespace_version(namespace)
+    built = skipped = 0
+
+    # 저장한 답변은 계속 재사용되므로 적응형 경로·자동 PASS 없이 항상 LLM 팩트체크를 거침
+    # (자동 검증은 명백한 오류를 바로 FAIL 처리하는 데만 사용)
+    previous_policy, previous_verifier = graph.ROUTING_POLICY, graph.CITATION_VERIFIER
+    graph.ROUTING_POLICY, graph.CITATION_VERIFIER = "fixed", "fail"
+    try:
+        results = []
+        for entry in entries:
+            print(f"\n📚 [FAQ 생성] {entry['id']}: {entry['question']}")
+            results.append((entry, graph.invoke_workflow(entry["question"])))
+    finally:
+        graph.ROUTING_POLICY, graph.CITATION_VERIFIER = previous_policy, previous_verifier
+
+    for entry, result in results:
+        if result.get("grade") != "PASS" or not result.get("sources"):
+            # 검증을 통과하지 못한 답변은 제공하지 않음 (이전 답변도 제거)
+            print(f"   ⚠️  [{entry['id']}] 검증 미통과 - 저장하지 않습니다.")
+            store["entries"].pop(entry["id"], None)
+            skipped += 1
+            continue
+
+        cited = cited_sources(result["draft"], result["sources"])
+        store["entries"][entry["id"]] = {
+            "question": entry["question"],
+            "keywords": entry.get("keywords", []),
+            "aliases": entry.get("aliases", []),
+            "answer": result["draft"],
+            "sources": [source["title"] for source in cited],
+            "articles": {article_id(source["title"], namespace): source["title"] for source in cited if source["key"]},
+            "version": version,
+        }
+        built += 1
+
+    _write_json(path, store)
+    print(f"\n✅ FAQ 답변 저장: {built}건 (제외 {skipped}건, 버전: {version or '-'})")
+    return {"built": built, "skipped": skipped}
+
+
+def refresh_faq_answers(changed_ids: Iterable[str], namespace: str = NAMESPACE) -> List[str]:
+    """
+    재적재 후 호출 - 인용 조항이 바뀐 FAQ만 다시 생성하고, 나머지는 새 버전으로 표시
+
+    Args:
+        changed_ids: 청크가 추가·변경·삭제된 조항 ID
+
+    Returns:
+        다시 생성한 FAQ ID 목록
+    """
+    path = store_path(namespace)
+    store = _read_json(path, None)
+    if not store or not store.get("entries"):
+        return []
+
+    changed = set(changed_ids)
+    version = get_namespace_version(namespace)
+    stale = []
+    for faq_id, entry in store["entries"].items():
+        # 인용 조항을 알 수 없는 답변은 변경 여부를 판단할 수 없으므로 다시 생성
+        if not entry.get("articles") or changed & set(entry["articles"]):
+            stale.append(faq_id)
+        else:
+            entry["version"] = version
+    _write_json(path, store)
+
+    if stale:
+        print(f"📚 인용 조항이 바뀐 FAQ {len(stale)}건 다시 생성: {', '.join(stale)}")
+        build_faq_answers(stale, namespace=namespace)
+    return stale
+
+
+if __name__ == "__main__":
+    build_faq_answers(sys.argv[1:] or None)
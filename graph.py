@@ -3,24 +3,76 @@ ZIC-TALK HR 챗봇 - LangGraph 워크플로우 엔진
 대화 맥락을 이해하고 3중 검증(Draft-Critic-Rewrite)을 수행합니다.
 """
 import os
-from typing import TypedDict, Literal, List, Dict
+import re
+import json
+import queue
+import asyncio
+import time
+import hashlib
+import threading
+import math
+import contextvars
+from contextlib import closing
+from typing import TypedDict, Literal, Any, List, Dict, Iterator, AsyncIterator, Optional, Callable
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
+from langchain_core.documents import Document
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from answer_cache import SemanticAnswerCache
+from query_cache import QueryCache, normalize_query
+from faq_store import FAQStore
+from conversation_memory import SUMMARY_ROLE, ConversationMemory
+from collections import OrderedDict
+from ingest import INDEX_DIR, get_namespace_version, load_article_titles, load_articles
+from hybrid_retriever import BM25Index, article_key, document_key, reciprocal_rank_fusion
+from reranker import Reranker, term_coverage
+from context_builder import build_sources, cited_sources, estimate_tokens, format_context
+from citation_verifier import FAIL, PASS, format_critique, verify_citations
+from tracing import Tracer, record, record_llm_usage
+from rate_limiter import ConcurrencyLimiter, TokenRateLimiter, call_with_backoff
+from single_flight import SingleFlight
 
 # 환경 설정
 load_dotenv()
 
 # ========== 설정 상수 ==========
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# 노드별 모델 (질문 재작성·팩트체크는 작은 모델, 초안·수정은 OPENAI_MODEL)
+REWRITE_MODEL = os.getenv("REWRITE_MODEL", "gpt-4o-mini")
+DRAFT_MODEL = os.getenv("DRAFT_MODEL", OPENAI_MODEL)
+CRITIC_MODEL = os.getenv("CRITIC_MODEL", "gpt-4o-mini")
+REVISE_MODEL = os.getenv("REVISE_MODEL", DRAFT_MODEL)
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "company-rules")
-PINECONE_NAMESPACE = "rules-2025"
-RETRIEVER_K = int(os.getenv("RETRIEVER_K", "5"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # pinecone | local
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")    # hybrid | vector
+PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE", "rules-2025")  # 조회할 규정 세트 (규정명-버전)
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "5"))  # 검색 후보 수 = 프롬프트에 넣을 최대 조항 수
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
 MAX_CHAT_HISTORY = int(os.getenv("MAX_CHAT_HISTORY", "6"))
 MAX_REVISION_COUNT = int(os.getenv("MAX_REVISION_COUNT", "2"))
+ROUTING_POLICY = os.getenv("ROUTING_POLICY", "adaptive")  # adaptive | fixed
+ROUTE_HIGH_CONFIDENCE = float(os.getenv("ROUTE_HIGH_CONFIDENCE", "0.6"))
+ROUTE_MAX_DRAFT_CHARS = int(os.getenv("ROUTE_MAX_DRAFT_CHARS", "600"))
+LIGHT_MAX_REVISION_COUNT = 1  # light 경로의 최대 수정 횟수
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", "512"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_PERSIST = os.getenv("QUERY_CACHE_PERSIST", "0") == "1"
+CONTEXT_REUSE_THRESHOLD = float(os.getenv("CONTEXT_REUSE_THRESHOLD", "0.85"))
+CONTEXT_REUSE_COVERAGE = float(os.getenv("CONTEXT_REUSE_COVERAGE", "0.75"))
+CITATION_VERIFIER = os.getenv("CITATION_VERIFIER", "full")  # full | fail | off
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_TOKENS_PER_MINUTE = int(os.getenv("BATCH_TOKENS_PER_MINUTE", "200000"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "5"))
+BATCH_COMPLETION_TOKENS = 500  # 호출 전에 확보할 응답 토큰 예상치
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))  # 0이면 제한 없음
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "1") == "1"
 
 # ========== 시스템 프롬프트 ==========
 REWRITE_SYSTEM_PROMPT = """당신은 대화 맥락을 이해하여 질문을 재작성하는 전문가입니다.
@@ -49,6 +101,11 @@ DRAFT_SYSTEM_PROMPT = """당신은 회사 취업규칙 전문 상담사입니다
 3. 사용자 친화적인 설명 추가
 4. 규정에 없는 내용이면 "해당 내용은 규정에 명시되어 있지 않습니다"라고 답변"""
 
+# 관련 조항을 하나도 찾지 못했을 때의 답변 (초안 작성·팩트체크 없이 바로 반환)
+NO_CONTEXT_ANSWER = """해당 내용은 규정에 명시되어 있지 않습니다.
+
+취업규칙·인사규정에서 질문과 관련된 조항을 찾지 못했습니다. 질문을 조금 더 구체적으로 바꾸시거나, 인사팀에 문의해 주세요."""
+
 CRITIQUE_SYSTEM_PROMPT = """당신은 엄격한 사실 검증 전문가입니다.
 
 주어진 답변이 규정 원문에 **정확히 일치**하는지 검증하세요.
@@ -66,99 +123,667 @@ class GraphState(TypedDict):
     question: str                       # 현재 처리 중인 질문 (변환된 쿼리)
     original_question: str              # 사용자의 원래 질문
     context: str                        # 검색된 규정 원문
+    sources: List[Dict[str, str]]       # 프롬프트에 넣은 조항 (중복 제거·토큰 예산 적용)
+    documents: List[Dict[str, Any]]     # 검색된 조항 원문 {"page_content", "metadata"} (다음 턴 재사용용)
+    previous_retrieval: Dict[str, Any]  # 직전 턴의 검색 결과 (없으면 빈 dict)
     draft: str                          # 생성된 답변 초안
     critique: str                       # 감사관의 지적사항
-    grade: str                          # 평가 결과 (PASS / FAIL)
+    grade: str                          # 평가 결과 (PASS / FAIL / NO_CONTEXT)
+    route: str                          # 실행 경로 (light / full / cache / no_context)
+    retrieval_confidence: float         # 검색된 조항의 최고 관련도 (경로 선택 기준)
     revision_count: int                 # 수정 횟수
     chat_history: List[Dict[str, str]]  # 대화 기록
+    question_embedding: List[float]     # 재작성된 질문의 임베딩
+    cache_hit: bool                     # 답변 캐시 적중 여부
+    trace_id: str                       # 트레이스 ID (노드별 지연·토큰 기록)
 
 # ========== 컴포넌트 초기화 ==========
-embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-vector_store = PineconeVectorStore.from_existing_index(
-    index_name=PINECONE_INDEX_NAME,
-    embedding=embeddings,
-    namespace=PINECONE_NAMESPACE
+# 모델·벡터 DB 클라이언트와 컴파일된 그래프는 프로세스 전체에서 하나씩만,
+# 처음 사용할 때 생성합니다. (모듈 import만으로는 네트워크 연결이나 그래프 컴파일이 일어나지 않음)
+# 벤치마크나 테스트에서는 configure_components()로 대체 구현을 주입할 수 있습니다.
+# 채팅 모델은 모델 이름별로 하나씩 만들고, 같은 모델을 쓰는 노드끼리 공유합니다.
+NODE_MODELS = {
+    "rewrite_question": REWRITE_MODEL,
+    "generate": DRAFT_MODEL,
+    "critic": CRITIC_MODEL,
+    "rewrite": REVISE_MODEL,
+}
+_components = {}
+_components_lock = threading.RLock()
+
+# 배치 실행 중인 질문의 LLM 호출이 함께 쓰는 분당 토큰 제한 (배치 밖에서는 None)
+_batch_limiter: contextvars.ContextVar[Optional[TokenRateLimiter]] = contextvars.ContextVar(
+    "batch_limiter", default=None
 )
-retriever = vector_store.as_retriever(search_kwargs={"k": RETRIEVER_K})
-llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0)
 
-# ========== 노드 함수들 ==========
-def rewrite_question(state: GraphState) -> GraphState:
-    """대화 기록을 참고하여 현재 질문을 독립적인 질문으로 재작성"""
+
+def _get_component(name: str, factory: Callable):
+    """컴포넌트를 한 번만 생성 (여러 스레드가 동시에 요청해도 생성은 1회)"""
+    if name in _components:
+        return _components[name]
+    with _components_lock:
+        if name not in _components:
+            _components[name] = factory()
+        return _components[name]
+
+
+def configure_components(llm=None, embeddings=None, vector_store=None, lexical_index=None, article_store=None,
+                         reranker=None):
+    """주어진 컴포넌트로 교체 (None인 항목은 그대로 둠, llm은 모든 노드에 적용)"""
+    overrides = {
+        **{f"llm:{model}": llm for model in {OPENAI_MODEL, *NODE_MODELS.values()}},
+        "embeddings": embeddings,
+        "vector_store": vector_store,
+        "lexical_index": lexical_index,
+        "article_store": article_store,
+        "reranker": reranker,
+    }
+    with _components_lock:
+        _components.update({name: value for name, value in overrides.items() if value is not None})
+
+
+def _create_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+def _create_vector_store():
+    if VECTOR_BACKEND == "local":
+        from local_index import LocalVectorIndex
+        return LocalVectorIndex.load(INDEX_DIR, PINECONE_NAMESPACE, embedding=get_embeddings())
+
+    from langchain_pinecone import PineconeVectorStore
+    return PineconeVectorStore.from_existing_index(
+        index_name=PINECONE_INDEX_NAME,
+        embedding=get_embeddings(),
+        namespace=PINECONE_NAMESPACE
+    )
+
+
+def _create_lexical_index():
+    if RETRIEVAL_MODE != "hybrid":
+        return None
+    index = BM25Index.load(INDEX_DIR, PINECONE_NAMESPACE)
+    if index is None:
+        print("⚠️  어휘(BM25) 인덱스가 없어 벡터 검색만 사용합니다. (python ingest.py 실행 필요)")
+    return index
+
+
+def _create_llm(model: str = OPENAI_MODEL):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=0)
+
+
+def get_embeddings():
+    return _get_component("embeddings", _create_embeddings)
+
+
+def get_vector_store():
+    return _get_component("vector_store", _create_vector_store)
+
+
+def get_lexical_index():
+    """BM25 인덱스 (vector 모드이거나 아직 적재 전이면 None)"""
+    return _get_component("lexical_index", _create_lexical_index)
+
+
+def get_llm(node: str = "generate"):
+    """노드에 설정된 채팅 모델 (NODE_MODELS에 없는 노드는 OPENAI_MODEL)"""
+    model = NODE_MODELS.get(node, OPENAI_MODEL)
+    return _get_component(f"llm:{model}", lambda: _create_llm(model))
+
+
+def get_llms() -> Dict[str, Any]:
+    """노드별 채팅 모델을 모두 생성 (예열용)"""
+    return {node: get_llm(node) for node in NODE_MODELS}
+
+
+def get_article_store() -> Dict:
+    """{조항 ID: 조항 원문 Document} (항/호 청크를 부모 조항으로 확장할 때 사용, 적재 전이면 빈 dict)"""
+    return _get_component("article_store", lambda: load_articles(PINECONE_NAMESPACE))
+
+
+def get_reranker() -> Reranker:
+    """검색 결과 재정렬기 (cross-encoder 모델은 처음 재정렬할 때 로드)"""
+    return _get_component("reranker", Reranker)
+
+
+tracer = Tracer()
+answer_cache = SemanticAnswerCache(
+    namespace=PINECONE_NAMESPACE,
+    threshold=ANSWER_CACHE_THRESHOLD,
+    max_size=ANSWER_CACHE_SIZE
+)
+faq_store = FAQStore(namespace=PINECONE_NAMESPACE)
+# 질문 임베딩 / 검색 결과 캐시 (정규화된 질문 기준, 재적재 시 무효화)
+embedding_cache = QueryCache(
+    f"embedding-{EMBEDDING_MODEL}", PINECONE_NAMESPACE,
+    max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, persist=QUERY_CACHE_PERSIST
+)
+retrieval_cache = QueryCache(
+    "retrieval", PINECONE_NAMESPACE,
+    max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, persist=QUERY_CACHE_PERSIST
+)
+# 프로세스 전체의 동시 LLM 호출 제한 (모든 노드·세션·배치가 공유)
+llm_limiter = ConcurrencyLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
+# 대화 기록 없는 같은 질문이 동시에 들어오면 한 번만 실행
+request_coalescer = SingleFlight()
+
+# ========== 질문 재작성 생략 판단 ==========
+# 이전 대화를 가리키는 표현 (있으면 반드시 LLM으로 재작성)
+ANAPHORA_PATTERN = re.compile(
+    r"(그럼|그러면|그렇다면|그건|그거|그것|그게|그걸|그런|그때|그렇|이건|이거|이것|이게|저건|저거|"
+    r"거기|아까|방금|위에서|앞에서|앞의|더 알려|자세히|나머지|그 외|그외|"
+    r"(^|\s)[그이저]\s)"
+)
+# 단어 끝의 조사 (용어 비교 전에 제거)
+JOSA_PATTERN = re.compile(r"(은|는|이|가|을|를|도|의|에|에서|으로|로|과|와|이란|란|만|요)$")
+# 조항 제목에 나오지만 그것만으로는 주제가 정해지지 않는 일반 용어 ("기간은요?", "직원도 해당되나요?")
+GENERIC_TERMS = {
+    "계산", "관계", "금지", "기간", "다른", "단축", "대응", "목적", "반환", "보전", "보호", "사건", "사실",
+    "시간", "연장", "예방", "예외", "적용범위", "접수", "정의", "제한", "조사", "조직", "조치", "준수",
+    "직원", "직장", "책임", "피해자", "행위", "허용", "확인", "야간", "임용",
+}
+# 조항 제목에는 없지만 직원들이 흔히 쓰는 인사 용어 (→ 관련 조항의 용어)
+HR_TERM_ALIASES = {
+    "연차": "연차유급휴가", "월차": "연차유급휴가", "출산휴가": "법정휴가", "육아휴직": "휴직사유",
+    "휴직": "휴직사유", "퇴직금": "퇴직", "사직": "퇴직", "산재": "재해보상",
+    "야근": "연장근무", "초과근무": "연장근무", "급여": "보수", "월급": "보수",
+}
+# 이보다 단어가 적은 질문("병가는요?")은 앞 질문의 내용을 생략한 후속 질문으로 봄
+STANDALONE_MIN_WORDS = 2
+
+_hr_terms = None
+_rewrite_cache: "OrderedDict[str, str]" = OrderedDict()
+_rewrite_cache_lock = threading.Lock()
+
+
+def _get_hr_terms() -> List[str]:
+    """조항 제목의 괄호 안 용어 (예: 제25조(연차유급휴가) → 연차유급휴가)"""
+    global _hr_terms
+    if _hr_terms is None:
+        terms = set()
+        for title in load_article_titles(PINECONE_NAMESPACE):
+            match = re.match(r"제\s?\d+\s?조(의\s?\d+)?\s*\(([^)]*)\)", title)
+            if not match:
+                continue
+            for term in re.split(r"[\s,‧·․]+|및", match.group(2)):
+                # "근속기간의", "손해배상과의" → "근속기간", "손해배상"
+                term = re.sub(r"(과의|의)$", "", term)
+                if len(term) >= 2 and term != "등" and term not in GENERIC_TERMS:
+                    terms.add(term)
+        _hr_terms = sorted(terms)
+    return _hr_terms
+
+
+def _strip_josa(word: str) -> str:
+    """'기간은요' → '기간' (조사가 두 개까지 붙은 경우)"""
+    for _ in range(2):
+        stripped = JOSA_PATTERN.sub("", word)
+        if len(stripped) < 2 or stripped == word:
+            break
+        word = stripped
+    return word
+
+
+def is_standalone_question(question: str) -> bool:
+    """
+    이전 대화 없이도 이해되는 질문인지 빠르게 판단
+    - 지시어/후속 표현(그럼, 그건, 그거 등)이 없고
+    - 두 단어 이상이며 ("병가는요?"처럼 짧은 질문은 앞 질문을 생략한 것일 수 있음)
+    - 조항 제목의 인사 용어(일반 용어 제외) 전체나 알려진 별칭("연차" 등)을 직접 언급하는 경우
+    """
+    if ANAPHORA_PATTERN.search(question):
+        return False
+    
+    words = [_strip_josa(word) for word in re.findall(r"[가-힣A-Za-z0-9]+", question)]
+    if len(words) < STANDALONE_MIN_WORDS:
+        return False
+    
+    if any(term in question for term in _get_hr_terms()):
+        return True
+    return any(word in HR_TERM_ALIASES for word in words)
+
+
+def _recent_history(state: GraphState) -> List[Dict[str, str]]:
+    return state.get("chat_history", [])[-MAX_CHAT_HISTORY:]
+
+
+def _format_history(history: List[Dict[str, str]], max_chars: int = None) -> str:
+    """대화 기록을 프롬프트용 텍스트로 (요약은 그대로, 메시지는 max_chars까지)"""
+    lines = []
+    for msg in history:
+        if msg["role"] == SUMMARY_ROLE:
+            lines.append(f"이전 대화 요약:\n{msg['content']}")
+            continue
+        content = msg["content"]
+        if max_chars and len(content) > max_chars:
+            content = content[:max_chars] + "..."
+        lines.append(f"{'사용자' if msg['role'] == 'user' else 'AI'}: {content}")
+    return "\n".join(lines)
+
+
+def compact_history(chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    전체 대화 기록을 요약 + 직전 대화 한 쌍으로 줄임
+    이미 ConversationMemory.to_history()로 만든 기록은 그대로 사용합니다.
+    """
+    if not chat_history or any(msg["role"] == SUMMARY_ROLE for msg in chat_history) or len(chat_history) <= 2:
+        return chat_history or []
+    return ConversationMemory.from_messages(chat_history).to_history()
+
+
+def _rewrite_cache_key(state: GraphState) -> str:
+    """(최근 대화 다이제스트, 질문) 캐시 키"""
+    history = json.dumps(_recent_history(state), ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha1(history.encode("utf-8")).hexdigest()
+    return f"{digest}:{state['original_question'].strip()}"
+
+
+def _resolve_rewrite_locally(state: GraphState):
+    """
+    LLM 호출 없이 재작성 결과를 정할 수 있으면 (질문, 사유)를 반환, 아니면 None
+    """
     question = state["original_question"]
-    chat_history = state.get("chat_history", [])
     
-    if chat_history and len(chat_history) > 0:
-        # 최근 대화만 참고
-        recent_history = chat_history[-MAX_CHAT_HISTORY:]
-        history_text = "\n".join([
-            f"{'사용자' if msg['role'] == 'user' else 'AI'}: {msg['content']}"
-            for msg in recent_history
-        ])
-        
-        messages = [
-            SystemMessage(content=REWRITE_SYSTEM_PROMPT),
-            HumanMessage(content=f"""이전 대화:
+    if not state.get("chat_history"):
+        return question, "first"
+    
+    if is_standalone_question(question):
+        return question, "standalone"
+    
+    with _rewrite_cache_lock:
+        key = _rewrite_cache_key(state)
+        if key in _rewrite_cache:
+            _rewrite_cache.move_to_end(key)
+            return _rewrite_cache[key], "cache"
+    
+    return None
+
+
+def _remember_rewrite(state: GraphState, rewritten: str):
+    """LLM 재작성 결과를 LRU 캐시에 저장"""
+    with _rewrite_cache_lock:
+        _rewrite_cache[_rewrite_cache_key(state)] = rewritten
+        while len(_rewrite_cache) > REWRITE_CACHE_SIZE:
+            _rewrite_cache.popitem(last=False)
+
+
+# ========== 스트리밍 헬퍼 ==========
+def _stream_callback(config: Optional[RunnableConfig]):
+    """stream_workflow가 넘겨준 콜백 (없으면 None)"""
+    return ((config or {}).get("configurable") or {}).get("stream_callback")
+
+
+def _emit(config: Optional[RunnableConfig], event: Dict):
+    """스트리밍 중이면 이벤트를 전달"""
+    callback = _stream_callback(config)
+    if callback is not None:
+        callback(event)
+
+
+def _invoke_llm(messages, node: str) -> str:
+    """노드의 모델로 LLM 호출 후 모델·토큰 사용량을 트레이스에 기록 (동시 호출 상한 안에서)"""
+    with llm_limiter.slot() as waited:
+        response = get_llm(node).invoke(messages)
+    record(model=NODE_MODELS.get(node, OPENAI_MODEL), llm_queue_ms=round(waited * 1000, 1))
+    record_llm_usage(response)
+    return response.content
+
+
+async def _ainvoke_llm(messages, node: str) -> str:
+    """
+    _invoke_llm의 비동기 버전
+    배치 실행 중이면 분당 토큰 한도 안에서 호출하고, 한도 초과 응답은 백오프로 재시도합니다.
+    """
+    llm = get_llm(node)
+
+    async def invoke():
+        # 재시도 대기 중에는 동시 호출 자리를 차지하지 않도록 호출마다 확보
+        async with llm_limiter.aslot() as waited:
+            response = await llm.ainvoke(messages)
+        record(llm_queue_ms=round(waited * 1000, 1))
+        return response
+
+    estimated = estimate_tokens("".join(message.content for message in messages)) + BATCH_COMPLETION_TOKENS
+    response = await _call_within_batch_limit(invoke, estimated)
+    limiter = _batch_limiter.get()
+    if limiter is not None:
+        limiter.settle(estimated, _response_tokens(response) or estimated)
+    record(model=NODE_MODELS.get(node, OPENAI_MODEL))
+    record_llm_usage(response)
+    return response.content
+
+
+async def _call_within_batch_limit(call: Callable[[], Any], estimated: int):
+    """
+    배치 실행 중이면 분당 토큰 한도 안에서 call()을 실행하고, 한도 초과 응답은 백오프로 재시도
+    (배치가 아니면 바로 실행, LLM·임베딩 호출 공용)
+    """
+    limiter = _batch_limiter.get()
+    if limiter is None:
+        return await call()
+    await limiter.acquire(estimated)
+    return await call_with_backoff(call, max_retries=BATCH_MAX_RETRIES, limiter=limiter)
+
+
+def _response_tokens(response) -> int:
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return usage.get("total_tokens", 0)
+
+
+def _count_prompt_tokens(messages, node: str) -> int:
+    """스트리밍 응답에는 사용량이 없으므로 프롬프트 토큰을 직접 계산"""
+    try:
+        return get_llm(node).get_num_tokens_from_messages(messages)
+    except Exception:
+        return 0
+
+
+def _generate(messages, node: str, config: Optional[RunnableConfig] = None) -> str:
+    """
+    답변 생성용 LLM 호출
+    스트리밍 중이면 토큰 단위로 이벤트를 내보내고, 아니면 한 번에 호출합니다.
+    """
+    callback = _stream_callback(config)
+    if callback is None:
+        return _invoke_llm(messages, node)
+    
+    chunks = []
+    with llm_limiter.slot() as waited:
+        for chunk in get_llm(node).stream(messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                callback({"type": "token", "text": chunk.content})
+    # 스트리밍 청크 1개 ≈ 토큰 1개
+    record(model=NODE_MODELS.get(node, OPENAI_MODEL), llm_queue_ms=round(waited * 1000, 1))
+    record_llm_usage(prompt_tokens=_count_prompt_tokens(messages, node), completion_tokens=len(chunks))
+    return "".join(chunks)
+
+
+async def _agenerate(messages, node: str, config: Optional[RunnableConfig] = None) -> str:
+    """_generate의 비동기 버전"""
+    callback = _stream_callback(config)
+    if callback is None:
+        return await _ainvoke_llm(messages, node)
+    
+    chunks = []
+    async with llm_limiter.aslot() as waited:
+        async for chunk in get_llm(node).astream(messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                callback({"type": "token", "text": chunk.content})
+    record(model=NODE_MODELS.get(node, OPENAI_MODEL), llm_queue_ms=round(waited * 1000, 1))
+    record_llm_usage(prompt_tokens=_count_prompt_tokens(messages, node), completion_tokens=len(chunks))
+    return "".join(chunks)
+
+
+# ========== 노드 공통 로직 ==========
+# 프롬프트 구성과 결과 반영은 동기/비동기 노드가 함께 사용하고,
+# 각 노드는 LLM·검색 호출 방식(invoke / ainvoke)만 다릅니다.
+def _rewrite_question_messages(state: GraphState):
+    """질문 재작성 프롬프트"""
+    question = state["original_question"]
+    
+    # 지난 대화 요약 + 직전 대화만 참고
+    history_text = _format_history(_recent_history(state))
+    
+    return [
+        SystemMessage(content=REWRITE_SYSTEM_PROMPT),
+        HumanMessage(content=f"""이전 대화:
 {history_text}
 
 현재 질문: {question}
 
 재작성된 질문:""")
-        ]
-        
-        response = llm.invoke(messages)
-        rewritten = response.content.strip()
-        
-        print(f"\n🔄 [질문 재작성]")
+    ]
+
+
+def _apply_rewritten_question(state: GraphState, rewritten: str, source: str) -> GraphState:
+    question = state["original_question"]
+    
+    if source == "first":
+        print(f"\n📝 [첫 질문] {question}")
+    elif source == "standalone":
+        print(f"\n📝 [독립 질문] 재작성 생략 - {question}")
+    else:
+        if source == "llm":
+            _remember_rewrite(state, rewritten)
+        print(f"\n🔄 [질문 재작성{' - 캐시' if source == 'cache' else ''}]")
         print(f"   원본: {question}")
         print(f"   재작성: {rewritten}")
-        
-        state["question"] = rewritten
+    
+    state["question"] = rewritten
+    return state
+
+
+def _skip_cache_lookup(state: GraphState) -> GraphState:
+    """조항 번호를 직접 조회하는 질문은 임베딩 없이 바로 검색으로 진행"""
+    state["question_embedding"] = []
+    state["cache_hit"] = False
+    print(f"\n📌 [조항 직접 조회] 임베딩·캐시 조회 생략")
+    return state
+
+
+def _apply_cache_lookup(state: GraphState, embedding: List[float]) -> GraphState:
+    state["question_embedding"] = embedding
+    
+    cached = answer_cache.lookup(embedding)
+    if cached:
+        state["draft"] = cached["answer"]
+        state["grade"] = "PASS"
+        state["route"] = "cache"
+        state["cache_hit"] = True
+        print(f"\n⚡ [답변 캐시] 적중 (유사도: {cached['score']:.3f}) - '{cached['question']}'")
     else:
-        state["question"] = question
-        print(f"\n📝 [첫 질문] {question}")
+        state["cache_hit"] = False
+        print(f"\n💨 [답변 캐시] 미스 - 워크플로우를 실행합니다.")
     
     return state
 
 
-def retrieve_context(state: GraphState) -> GraphState:
-    """벡터 DB에서 관련 규정을 검색"""
+def _cited_documents(question: str):
+    """질문이 '제N조'를 직접 언급하면 해당 조항을 반환 (임베딩 호출 없음)"""
+    lexical_index = get_lexical_index()
+    if lexical_index is None:
+        return []
+    return _expand_to_parents(lexical_index.lookup_articles(question))
+
+
+def _embed_query(question: str) -> List[float]:
+    """질문 임베딩 (캐시 적중 시 API 호출 없음)"""
+    key = normalize_query(question)
+    embedding = embedding_cache.get(key)
+    if embedding is None:
+        embedding = get_embeddings().embed_query(question)
+        embedding_cache.put(key, embedding)
+    return embedding
+
+
+async def _aembed_query(question: str) -> List[float]:
+    """_embed_query의 비동기 버전 (배치 실행 중이면 LLM 호출과 같은 분당 토큰 한도·재시도 적용)"""
+    key = normalize_query(question)
+    embedding = embedding_cache.get(key)
+    if embedding is None:
+        embeddings = get_embeddings()
+        embedding = await _call_within_batch_limit(lambda: embeddings.aembed_query(question), estimate_tokens(question))
+        embedding_cache.put(key, embedding)
+    return embedding
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+
+def _reuse_previous_context(state: GraphState, embedding: List[float]) -> Optional[List[Document]]:
+    """
+    직전 턴의 검색 결과로 답할 수 있으면 그 조항을 반환 (벡터 DB 검색 생략)
+
+    - 재작성된 질문이 직전 질문과 임베딩 유사도 CONTEXT_REUSE_THRESHOLD 이상이면 그대로 재사용
+    - 아니어도 직전 조항 중 하나가 질문 용어를 CONTEXT_REUSE_COVERAGE 이상 포함하면,
+      질문 용어를 포함한 조항만 포함률 순으로 재사용
+    - 재적재로 버전이 바뀌었으면 재사용하지 않음
+    """
+    previous = state.get("previous_retrieval") or {}
+    if not previous.get("documents") or previous.get("version") != get_namespace_version(PINECONE_NAMESPACE):
+        return None
+    
+    docs = [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in previous["documents"]]
     question = state["question"]
-    print(f"\n🔍 [규정 검색] '{question}'에 대한 관련 조항 검색 중...")
+    if embedding and previous.get("embedding") and _cosine(embedding, previous["embedding"]) >= CONTEXT_REUSE_THRESHOLD:
+        reason = "유사 질문"
+    else:
+        lexical_index = get_lexical_index()
+        idf = lexical_index.idf if lexical_index is not None else None
+        coverage = {document_key(doc): term_coverage(question, doc.page_content, idf) for doc in docs}
+        if max(coverage.values()) < CONTEXT_REUSE_COVERAGE:
+            return None
+        docs = sorted((doc for doc in docs if coverage[document_key(doc)] > 0),
+                      key=lambda doc: coverage[document_key(doc)], reverse=True)
+        reason = "직전 조항이 질문 포함"
+    
+    record(context_reused=True)
+    print(f"   ♻️  [검색 생략] 직전 턴의 조항 {len(docs)}개 재사용 ({reason})")
+    return docs
+
+
+def _retrieval_snapshot(result: GraphState) -> Optional[Dict[str, Any]]:
+    """다음 턴에 재사용할 검색 결과 (검색하지 않은 턴이면 None)"""
+    if not result.get("documents"):
+        return None
+    return {
+        "question": result["question"],
+        "embedding": result.get("question_embedding") or [],
+        "documents": result["documents"],
+        "version": get_namespace_version(PINECONE_NAMESPACE),
+    }
+
+
+def _retrieval_cache_key(question: str) -> str:
+    reranker = get_reranker()
+    return (f"{normalize_query(question)}|{PINECONE_NAMESPACE}|{RETRIEVER_K}|{RETRIEVAL_MODE}|"
+            f"{reranker.mode}:{reranker.min_score}:{reranker.relative_cutoff}")
+
+
+def _search_documents(question: str, embedding: List[float]):
+    """검색 결과 캐시를 먼저 확인하고, 없으면 검색하여 저장"""
+    key = _retrieval_cache_key(question)
+    cached = retrieval_cache.get(key)
+    if cached is not None:
+        record(retrieval_cache_hit=True)
+        return [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in cached]
+    
+    docs = _search_index(question, embedding)
+    retrieval_cache.put(key, [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs])
+    return docs
+
+
+def _search_index(question: str, embedding: List[float]):
+    """
+    벡터 검색 결과와 BM25 결과를 RRF로 결합한 뒤 (어휘 인덱스가 없으면 벡터만)
+    관련도로 재정렬하여 기준을 넘는 조항만 반환 (관련 조항이 없으면 빈 목록)
+    """
+    results = get_vector_store().similarity_search_by_vector_with_score(embedding, k=RETRIEVER_K)
+    vector_docs = [doc for doc, _ in results]
+    # 조항별 벡터 유사도 (같은 조항의 청크 중 가장 높은 값)
+    vector_scores: Dict[str, float] = {}
+    for doc, score in results:
+        key = document_key(doc)
+        vector_scores[key] = max(score, vector_scores.get(key, score))
     
-    docs = retriever.invoke(question)
+    lexical_index = get_lexical_index()
+    if lexical_index is None:
+        candidates = _expand_to_parents(vector_docs)
+    else:
+        lexical_docs = [doc for doc, _ in lexical_index.search(question, k=RETRIEVER_K)]
+        # 같은 조항의 항/호 청크는 article_id가 같으므로 RRF에서 조항 단위로 점수가 합쳐짐
+        candidates = _expand_to_parents(reciprocal_rank_fusion([vector_docs, lexical_docs], k=RETRIEVER_K))
     
-    context_parts = []
-    for i, doc in enumerate(docs, 1):
-        article_title = doc.metadata.get("article_title", "Unknown")
-        content = doc.page_content
-        context_parts.append(f"[문서 {i}] {article_title}\n{content}")
+    reranker = get_reranker()
+    ranked = reranker.rerank(
+        question, candidates, vector_scores, RETRIEVER_K,
+        idf=lexical_index.idf if lexical_index is not None else None
+    )
+    record(candidates=len(candidates), rerank_scores=[round(score, 3) for _, score in ranked])
+    if candidates and not ranked:
+        print(f"   ⚠️  관련도 {reranker.min_score} 이상인 조항이 없습니다. (후보 {len(candidates)}개)")
+    # 관련도는 경로 선택에 쓰므로 메타데이터에 남김 (조항 저장소의 문서는 공유되므로 복사)
+    return [Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance": round(score, 4)})
+            for doc, score in ranked]
+
+
+def _expand_to_parents(docs):
+    """항/호 청크를 부모 조항으로 확장 (같은 조항은 한 번만, 검색 순서 유지)"""
+    articles = get_article_store()
+    expanded = []
+    seen = set()
+    for doc in docs:
+        article_id = doc.metadata.get("article_id") or doc.page_content[:50]
+        if article_id in seen:
+            continue
+        seen.add(article_id)
+        expanded.append(articles.get(article_id, doc))
+    return expanded
+
+
+def _retrieval_confidence(docs) -> float:
+    """검색된 조항의 최고 관련도 (관련도가 없는 문서는 '제N조' 직접 조회 결과이므로 1.0)"""
+    return max((doc.metadata.get("relevance", 1.0) for doc in docs), default=0.0)
+
+
+def _choose_route(confidence: float) -> str:
+    """
+    검색 신뢰도로 실행 경로 선택 (adaptive 정책)
+    - light: 관련도가 가장 높은 조항을 인용하고 인용 검증을 통과하면 LLM 팩트체크 생략, 수정은 최대 LIGHT_MAX_REVISION_COUNT회
+    - full:  항상 LLM 팩트체크, 수정은 최대 MAX_REVISION_COUNT회
+    """
+    if ROUTING_POLICY != "adaptive":
+        return "full"
+    return "light" if confidence >= ROUTE_HIGH_CONFIDENCE else "full"
+
+
+def _apply_documents(state: GraphState, docs) -> GraphState:
+    sources = build_sources(state["question"], docs, CONTEXT_TOKEN_BUDGET)
+    state["documents"] = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+    state["sources"] = sources
+    state["context"] = format_context(sources)
+    record(context_tokens=estimate_tokens(state["context"]))
     
-    context = "\n\n---\n\n".join(context_parts)
-    state["context"] = context
+    if not sources:
+        # 근거가 없으면 LLM이 쓸 수 있는 답도 정해져 있으므로 초안·팩트체크를 생략
+        state["draft"] = NO_CONTEXT_ANSWER
+        state["grade"] = "NO_CONTEXT"
+        state["route"] = "no_context"
+        print(f"   ⚠️  관련 조항이 없어 '규정에 명시되어 있지 않음'으로 바로 답변합니다.")
+        return state
     
-    print(f"   ✅ 총 {len(docs)}개의 관련 조항을 찾았습니다.")
+    state["retrieval_confidence"] = _retrieval_confidence(docs)
+    state["route"] = _choose_route(state["retrieval_confidence"])
+    record(route=state["route"], retrieval_confidence=state["retrieval_confidence"])
+    print(f"   ✅ 총 {len(sources)}개의 관련 조항을 찾았습니다. "
+          f"(관련도 {state['retrieval_confidence']:.2f} → {state['route']} 경로)")
     return state
 
 
-def generate_draft(state: GraphState) -> GraphState:
-    """검색된 규정을 바탕으로 초안을 작성"""
+def _cited_context(state: GraphState, text: str) -> str:
+    """답변·피드백이 인용한 조항만으로 만든 규정 원문 (팩트체크·수정 단계용)"""
+    if not state.get("sources"):
+        return state["context"]
+    return format_context(cited_sources(text, state["sources"]))
+
+
+def _draft_messages(state: GraphState):
     question = state["question"]
     context = state["context"]
     chat_history = state.get("chat_history", [])
     
-    print(f"\n✍️  [초안 작성] 답변 생성 중...")
-    
-    # 대화 기록을 간단히 요약하여 프롬프트에 포함
+    # 대화 요약과 직전 대화를 짧게 프롬프트에 포함
     history_context = ""
-    if chat_history and len(chat_history) > 0:
-        recent = chat_history[-4:]
-        history_context = "\n\n이전 대화 참고:\n" + "\n".join([
-            f"- {msg['role']}: {msg['content'][:100]}..."
-            for msg in recent
-        ])
-    
-    messages = [
+    if chat_history:
+        history_context = "\n\n이전 대화 참고:\n" + _format_history(chat_history, max_chars=100)
+    
+    return [
         SystemMessage(content=f"""{DRAFT_SYSTEM_PROMPT}
 
 **검색된 규정**:
@@ -167,24 +792,67 @@ def generate_draft(state: GraphState) -> GraphState:
 """),
         HumanMessage(content=question)
     ]
-    
-    response = llm.invoke(messages)
-    draft = response.content
+
+
+def _apply_draft(state: GraphState, draft: str) -> GraphState:
     state["draft"] = draft
-    
     print(f"   ✅ 초안 작성 완료 (길이: {len(draft)} 글자)")
+    if state.get("route") == "light" and len(draft) > ROUTE_MAX_DRAFT_CHARS:
+        # 긴 답변은 여러 조항을 종합한 경우가 많으므로 전체 검증
+        state["route"] = "full"
+        record(route="full")
+        print(f"   ↪️  답변이 길어 full 경로로 전환합니다. ({ROUTE_MAX_DRAFT_CHARS}자 초과)")
     return state
 
 
-def critique_answer(state: GraphState) -> GraphState:
-    """작성된 답변을 팩트체크하고 평가"""
+def _cites_top_sources(state: GraphState, citations: List[str]) -> bool:
+    """
+    답변이 관련도가 가장 높은 조항을 인용했고, 인용한 조항이 모두 light 경로 기준 이상의 관련도인지
+    (검색된 조항을 인용했더라도 질문과 관련이 낮은 조항이면 LLM 팩트체크로 관련성을 확인)
+    """
+    relevance: Dict[str, float] = {}
+    for doc in state.get("documents") or []:
+        key = article_key(doc["metadata"].get("article_title", ""))
+        if key:
+            relevance[key] = max(relevance.get(key, 0.0), doc["metadata"].get("relevance", 1.0))
+    cited = [relevance[key] for key in citations if key in relevance]
+    if not cited:
+        return False
+    return max(cited) >= max(relevance.values()) and min(cited) >= ROUTE_HIGH_CONFIDENCE
+
+
+def _verify_citations(state: GraphState) -> Optional[str]:
+    """
+    규칙 기반 인용 검증 (LLM 팩트체크 전 단계)
+    판정이 확실하면 LLM 팩트체크와 같은 형식의 피드백을, 아니면 None을 반환합니다.
+
+    - full: 명백한 오류는 바로 FAIL, 인용·숫자가 모두 원문과 일치하면 바로 PASS
+    - fail: 명백한 오류만 바로 FAIL (통과 판정은 항상 LLM이 내림)
+    - off:  항상 LLM 팩트체크
+    adaptive 정책에서는 full 경로(검색 신뢰도가 낮거나 긴 답변)의 자동 PASS를 인정하지 않고,
+    light 경로도 답변이 관련도가 가장 높은 조항을 인용한 경우에만 자동 PASS를 인정합니다.
+    """
+    if CITATION_VERIFIER == "off" or not state.get("sources"):
+        return None
+    # 숫자는 프롬프트용으로 줄인 본문이 아니라 검색된 조항 원문 전체와 대조
+    result = verify_citations(state["draft"], state["sources"], state.get("documents"))
+    record(verifier=result["verdict"])
+    trust_pass = CITATION_VERIFIER == "full" and (
+        ROUTING_POLICY != "adaptive"
+        or (state.get("route") == "light" and _cites_top_sources(state, result["citations"]))
+    )
+    if result["verdict"] == FAIL or (result["verdict"] == PASS and trust_pass):
+        print(f"   ⚡ 자동 검증 {result['verdict']} - LLM 팩트체크 생략")
+        return format_critique(result)
+    return None
+
+
+def _critique_messages(state: GraphState):
     draft = state["draft"]
-    context = state["context"]
+    context = _cited_context(state, draft)
     question = state["question"]
     
-    print(f"\n🔍 [팩트체크] 답변 검증 중...")
-    
-    messages = [
+    return [
         SystemMessage(content=CRITIQUE_SYSTEM_PROMPT),
         HumanMessage(content=f"""질문: {question}
 
@@ -196,9 +864,9 @@ def critique_answer(state: GraphState) -> GraphState:
 
 평가를 시작하세요:""")
     ]
-    
-    response = llm.invoke(messages)
-    critique = response.content
+
+
+def _apply_critique(state: GraphState, critique: str) -> GraphState:
     state["critique"] = critique
     
     if "PASS" in critique.split('\n')[0].upper():
@@ -212,18 +880,21 @@ def critique_answer(state: GraphState) -> GraphState:
     return state
 
 
-def rewrite_answer(state: GraphState) -> GraphState:
-    """피드백을 반영하여 답변을 수정"""
+def _rewrite_answer_messages(state: GraphState, config: Optional[RunnableConfig]):
     draft = state["draft"]
     critique = state["critique"]
-    context = state["context"]
+    # 피드백이 지적한 다른 조항도 함께 넘겨 잘못된 인용을 바로잡을 수 있게 함
+    context = _cited_context(state, draft + "\n" + critique)
     question = state["question"]
     
     state["revision_count"] = state.get("revision_count", 0) + 1
     
     print(f"\n🔧 [답변 수정] {state['revision_count']}차 수정 중...")
     
-    messages = [
+    # 이미 스트리밍한 초안은 버리고, 수정된 답변으로 교체하도록 알림
+    _emit(config, {"type": "reset", "revision": state["revision_count"], "critique": critique})
+    
+    return [
         SystemMessage(content=f"""당신은 피드백을 받아 답변을 개선하는 전문가입니다.
 
 **검증 피드백**:
@@ -241,86 +912,596 @@ def rewrite_answer(state: GraphState) -> GraphState:
 
 수정된 답변:""")
     ]
-    
-    response = llm.invoke(messages)
-    revised = response.content
+
+
+def _apply_revision(state: GraphState, revised: str) -> GraphState:
     state["draft"] = revised
-    
     print(f"   ✅ 수정 완료")
     return state
 
 
+# ========== 노드 함수들 ==========
+def rewrite_question(state: GraphState) -> GraphState:
+    """대화 기록을 참고하여 현재 질문을 독립적인 질문으로 재작성"""
+    resolved = _resolve_rewrite_locally(state)
+    if resolved:
+        return _apply_rewritten_question(state, *resolved)
+    
+    rewritten = _invoke_llm(_rewrite_question_messages(state), "rewrite_question").strip()
+    return _apply_rewritten_question(state, rewritten, "llm")
+
+
+def lookup_cache(state: GraphState) -> GraphState:
+    """재작성된 질문을 임베딩하여 답변 캐시를 조회"""
+    if _cited_documents(state["question"]):
+        return _skip_cache_lookup(state)
+    started = time.perf_counter()
+    embedding = _embed_query(state["question"])
+    record(embedding_ms=round((time.perf_counter() - started) * 1000, 1))
+    return _apply_cache_lookup(state, embedding)
+
+
+def retrieve_context(state: GraphState) -> GraphState:
+    """벡터 DB에서 관련 규정을 검색"""
+    question = state["question"]
+    print(f"\n🔍 [규정 검색] '{question}'에 대한 관련 조항 검색 중...")
+    
+    started = time.perf_counter()
+    docs = _cited_documents(question)
+    if not docs:
+        # 캐시 조회 때 계산한 임베딩이 있으면 재사용 (임베딩 호출 1회 절약)
+        embedding = state.get("question_embedding") or _embed_query(question)
+        docs = _reuse_previous_context(state, embedding) or _search_documents(question, embedding)
+    record(retrieval_ms=round((time.perf_counter() - started) * 1000, 1), documents=len(docs))
+    return _apply_documents(state, docs)
+
+
+def generate_draft(state: GraphState, config: RunnableConfig = None) -> GraphState:
+    """검색된 규정을 바탕으로 초안을 작성"""
+    print(f"\n✍️  [초안 작성] 답변 생성 중...")
+    draft = _generate(_draft_messages(state), "generate", config)
+    return _apply_draft(state, draft)
+
+
+def critique_answer(state: GraphState) -> GraphState:
+    """작성된 답변을 팩트체크하고 평가"""
+    print(f"\n🔍 [팩트체크] 답변 검증 중...")
+    critique = _verify_citations(state) or _invoke_llm(_critique_messages(state), "critic")
+    return _apply_critique(state, critique)
+
+
+def rewrite_answer(state: GraphState, config: RunnableConfig = None) -> GraphState:
+    """피드백을 반영하여 답변을 수정"""
+    messages = _rewrite_answer_messages(state, config)
+    revised = _generate(messages, "rewrite", config)
+    return _apply_revision(state, revised)
+
+
+# ========== 비동기 노드 함수들 ==========
+# I/O 대기 중에 이벤트 루프를 양보하므로, 한 워커가 여러 대화를 동시에 처리할 수 있습니다.
+async def arewrite_question(state: GraphState) -> GraphState:
+    """rewrite_question의 비동기 버전"""
+    resolved = _resolve_rewrite_locally(state)
+    if resolved:
+        return _apply_rewritten_question(state, *resolved)
+    
+    rewritten = (await _ainvoke_llm(_rewrite_question_messages(state), "rewrite_question")).strip()
+    return _apply_rewritten_question(state, rewritten, "llm")
+
+
+async def alookup_cache(state: GraphState) -> GraphState:
+    """lookup_cache의 비동기 버전"""
+    if _cited_documents(state["question"]):
+        return _skip_cache_lookup(state)
+    started = time.perf_counter()
+    embedding = await _aembed_query(state["question"])
+    record(embedding_ms=round((time.perf_counter() - started) * 1000, 1))
+    return _apply_cache_lookup(state, embedding)
+
+
+async def aretrieve_context(state: GraphState) -> GraphState:
+    """retrieve_context의 비동기 버전"""
+    question = state["question"]
+    print(f"\n🔍 [규정 검색] '{question}'에 대한 관련 조항 검색 중...")
+    
+    started = time.perf_counter()
+    docs = _cited_documents(question)
+    if not docs:
+        embedding = state.get("question_embedding") or await _aembed_query(question)
+        docs = _reuse_previous_context(state, embedding)
+        if not docs and VECTOR_BACKEND == "local":
+            # 로컬 인덱스는 마이크로초 단위라 스레드로 넘길 필요가 없음
+            docs = _search_documents(question, embedding)
+        elif not docs:
+            # Pinecone 클라이언트는 동기 방식이므로 스레드에서 실행
+            docs = await asyncio.to_thread(_search_documents, question, embedding)
+    record(retrieval_ms=round((time.perf_counter() - started) * 1000, 1), documents=len(docs))
+    return _apply_documents(state, docs)
+
+
+async def agenerate_draft(state: GraphState, config: RunnableConfig = None) -> GraphState:
+    """generate_draft의 비동기 버전"""
+    print(f"\n✍️  [초안 작성] 답변 생성 중...")
+    draft = await _agenerate(_draft_messages(state), "generate", config)
+    return _apply_draft(state, draft)
+
+
+async def acritique_answer(state: GraphState) -> GraphState:
+    """critique_answer의 비동기 버전"""
+    print(f"\n🔍 [팩트체크] 답변 검증 중...")
+    critique = _verify_citations(state) or await _ainvoke_llm(_critique_messages(state), "critic")
+    return _apply_critique(state, critique)
+
+
+async def arewrite_answer(state: GraphState, config: RunnableConfig = None) -> GraphState:
+    """rewrite_answer의 비동기 버전"""
+    messages = _rewrite_answer_messages(state, config)
+    revised = await _agenerate(messages, "rewrite", config)
+    return _apply_revision(state, revised)
+
+
+def route_after_cache(state: GraphState) -> Literal["hit", "miss"]:
+    """캐시 적중 시 바로 종료, 아니면 검색으로 진행"""
+    return "hit" if state.get("cache_hit") else "miss"
+
+
+def route_after_retrieve(state: GraphState) -> Literal["found", "none"]:
+    """관련 조항이 있으면 초안 작성, 없으면 바로 종료"""
+    return "found" if state.get("sources") else "none"
+
+
 def should_continue(state: GraphState) -> Literal["rewrite", "end"]:
     """답변이 통과했는지, 재작성이 필요한지 판단"""
     if state["grade"] == "PASS":
         return "end"
     
-    if state.get("revision_count", 0) >= MAX_REVISION_COUNT:
-        print("\n⚠️  최대 수정 횟수 도달 - 현재 답변으로 종료합니다.")
+    limit = MAX_REVISION_COUNT
+    if state.get("route") == "light":
+        limit = min(LIGHT_MAX_REVISION_COUNT, MAX_REVISION_COUNT)
+    if state.get("revision_count", 0) >= limit:
+        print(f"\n⚠️  최대 수정 횟수({limit}회) 도달 - 현재 답변으로 종료합니다.")
         return "end"
     
     return "rewrite"
 
 
 # ========== 그래프 구성 ==========
-workflow = StateGraph(GraphState)
-
-# 노드 추가
-workflow.add_node("rewrite_question", rewrite_question)
-workflow.add_node("retrieve", retrieve_context)
-workflow.add_node("generate", generate_draft)
-workflow.add_node("critique", critique_answer)
-workflow.add_node("rewrite", rewrite_answer)
-
-# 엣지 연결
-workflow.set_entry_point("rewrite_question")
-workflow.add_edge("rewrite_question", "retrieve")
-workflow.add_edge("retrieve", "generate")
-workflow.add_edge("generate", "critique")
-
-# 조건부 엣지
-workflow.add_conditional_edges(
-    "critique",
-    should_continue,
-    {
-        "rewrite": "rewrite",
-        "end": END
-    }
-)
-workflow.add_edge("rewrite", "critique")
+def build_workflow(nodes: Dict[str, Callable]):
+    """
+    노드 함수 묶음으로 워크플로우를 구성하여 컴파일
+    동기 노드와 비동기 노드가 같은 그래프 구조를 공유합니다.
+    """
+    workflow = StateGraph(GraphState)
+    
+    # 노드 추가 (노드별 소요 시간·토큰 사용량 트레이싱)
+    for name, node in nodes.items():
+        workflow.add_node(name, tracer.traced(name, node))
+    
+    # 엣지 연결
+    workflow.set_entry_point("rewrite_question")
+    workflow.add_edge("rewrite_question", "lookup_cache")
+    workflow.add_conditional_edges(
+        "lookup_cache",
+        route_after_cache,
+        {
+            "hit": END,
+            "miss": "retrieve"
+        }
+    )
+    workflow.add_conditional_edges(
+        "retrieve",
+        route_after_retrieve,
+        {
+            "found": "generate",
+            "none": END
+        }
+    )
+    workflow.add_edge("generate", "critic")
+    
+    # 조건부 엣지
+    workflow.add_conditional_edges(
+        "critic",
+        should_continue,
+        {
+            "rewrite": "rewrite",
+            "end": END
+        }
+    )
+    workflow.add_edge("rewrite", "critic")
+    
+    # 컴파일
+    return workflow.compile()
+
 
-# 컴파일
-app = workflow.compile()
+def get_app():
+    """동기 노드로 구성된 컴파일된 그래프 (처음 호출할 때 컴파일)"""
+    return _get_component("app", lambda: build_workflow({
+        "rewrite_question": rewrite_question,
+        "lookup_cache": lookup_cache,
+        "retrieve": retrieve_context,
+        "generate": generate_draft,
+        "critic": critique_answer,
+        "rewrite": rewrite_answer,
+    }))
+
+
+def get_async_app():
+    """비동기 노드로 구성된 컴파일된 그래프 (처음 호출할 때 컴파일)"""
+    return _get_component("async_app", lambda: build_workflow({
+        "rewrite_question": arewrite_question,
+        "lookup_cache": alookup_cache,
+        "retrieve": aretrieve_context,
+        "generate": agenerate_draft,
+        "critic": acritique_answer,
+        "rewrite": arewrite_answer,
+    }))
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    첫 질문이 초기화 비용을 치르지 않도록 모든 컴포넌트를 미리 생성
+    (클라이언트 생성, 벡터 DB 연결, BM25 인덱스·조항 용어 로드, 그래프 컴파일)
+
+    여러 번 호출해도 이미 만들어진 컴포넌트는 다시 만들지 않습니다.
+
+    Returns:
+        단계별 소요 시간 (ms)
+    """
+    steps = [
+        ("llm", get_llms),
+        ("embeddings", get_embeddings),
+        ("vector_store", get_vector_store),
+        ("lexical_index", get_lexical_index),
+        ("article_store", get_article_store),
+        ("reranker", get_reranker),
+        ("hr_terms", _get_hr_terms),
+        ("app", get_app),
+        ("async_app", get_async_app),
+    ]
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"🔥 예열 완료: {sum(timings.values()):.0f}ms")
+    return timings
+
+
+def is_warmed_up() -> bool:
+    """warm_up()으로 만드는 컴포넌트가 모두 준비되었는지 여부"""
+    names = ("embeddings", "vector_store", "lexical_index", "article_store", "reranker", "app", "async_app")
+    llms = {f"llm:{model}" for model in NODE_MODELS.values()}
+    return all(name in _components for name in (*names, *llms))
 
 
 # ========== 실행 헬퍼 함수 ==========
-def run_workflow(question: str, chat_history: List[Dict[str, str]] = None):
+def run_workflow(question: str, chat_history: List[Dict[str, str]] = None,
+                 previous_retrieval: Optional[Dict[str, Any]] = None):
     """
     워크플로우를 실행하고 최종 답변을 반환
     
     Args:
         question: 사용자 질문
         chat_history: 이전 대화 기록 [{"role": "user", "content": "..."}, ...]
+        previous_retrieval: 직전 턴의 검색 결과 (ConversationMemory.last_retrieval) - 후속 질문이면 재사용
     
     Returns:
         최종 답변 문자열
     """
-    if chat_history is None:
-        chat_history = []
+    faq = _lookup_faq(question)
+    if faq:
+        return faq["answer"]
+    return _invoke_shared(question, chat_history, previous_retrieval)["draft"]
+
+
+def answer_question(question: str, chat_history: List[Dict[str, str]] = None,
+                    previous_retrieval: Optional[Dict[str, Any]] = None) -> Dict:
+    """
+    run_workflow와 같지만 평가 결과와 캐시 적중 여부도 함께 반환 (HTTP API용)
+
+    Returns:
+        {"answer": 최종 답변, "grade": ..., "cache_hit": ..., "route": 실행 경로,
+         "retrieval": 이번 턴의 검색 결과 또는 None}
+        (stream_workflow의 done 이벤트와 같은 형식)
+    """
+    faq = _lookup_faq(question)
+    if faq:
+        return _faq_answer(faq)
+    return _answer_fields(_invoke_shared(question, chat_history, previous_retrieval))
+
+
+async def aanswer_question(question: str, chat_history: List[Dict[str, str]] = None,
+                           previous_retrieval: Optional[Dict[str, Any]] = None) -> Dict:
+    """
+    answer_question의 비동기 버전 (비동기 그래프의 ainvoke 사용, HTTP API /chat용)
+    LLM 응답을 기다리는 동안 이벤트 루프를 양보하므로 워커 스레드 없이 여러 요청을 동시에 처리합니다.
+    """
+    faq = _lookup_faq(question)
+    if faq:
+        return _faq_answer(faq)
+    result = await request_coalescer.ado(
+        _coalesce_key(question, chat_history, previous_retrieval),
+        lambda: _arun(question, chat_history, previous_retrieval)
+    )
+    return _answer_fields(result)
+
+
+def _faq_answer(faq: Dict) -> Dict:
+    return {"answer": faq["answer"], "grade": "PASS", "cache_hit": True, "route": "faq", "retrieval": None}
+
+
+def _answer_fields(result: GraphState) -> Dict:
+    return {"answer": result["draft"], "grade": result.get("grade", ""), "cache_hit": result.get("cache_hit", False),
+            "route": result.get("route", ""), "retrieval": _retrieval_snapshot(result)}
+
+
+def _coalesce_key(question: str, chat_history: List[Dict[str, str]] = None,
+                  previous_retrieval: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    동시에 들어온 같은 질문을 합칠 키 (합치지 않으면 None)
+    대화 기록이 있으면 같은 문장이라도 뜻이 달라질 수 있으므로 첫 질문만 합칩니다.
+    """
+    if not SINGLE_FLIGHT or chat_history or previous_retrieval:
+        return None
+    return f"{normalize_query(question)}|{PINECONE_NAMESPACE}"
+
+
+def _invoke_shared(question: str, chat_history: List[Dict[str, str]] = None,
+                   previous_retrieval: Optional[Dict[str, Any]] = None) -> GraphState:
+    """invoke_workflow와 같지만, 실행 중인 같은 첫 질문이 있으면 그 결과를 함께 받음 (결과는 읽기 전용)"""
+    return request_coalescer.do(
+        _coalesce_key(question, chat_history, previous_retrieval),
+        lambda: invoke_workflow(question, chat_history, previous_retrieval)
+    )
+
+
+def invoke_workflow(question: str, chat_history: List[Dict[str, str]] = None,
+                    previous_retrieval: Optional[Dict[str, Any]] = None) -> GraphState:
+    """FAQ 조회 없이 그래프를 실행하고 최종 상태 전체를 반환 (근거 조항·평가 포함)"""
+    inputs = _initial_state(question, chat_history, previous_retrieval)
+    try:
+        result = get_app().invoke(inputs)
+    except Exception as e:
+        tracer.finish_run(inputs["trace_id"], error=e)
+        raise
+    _finalize(result)
+    return result
+
+
+async def arun_workflow(question: str, chat_history: List[Dict[str, str]] = None,
+                        previous_retrieval: Optional[Dict[str, Any]] = None):
+    """
+    run_workflow의 비동기 버전 (비동기 그래프의 ainvoke 사용)
+    
+    LLM·검색 응답을 기다리는 동안 이벤트 루프를 양보하므로,
+    한 워커에서 여러 대화를 동시에 처리할 수 있습니다.
+    """
+    faq = _lookup_faq(question)
+    if faq:
+        return faq["answer"]
+    result = await request_coalescer.ado(
+        _coalesce_key(question, chat_history, previous_retrieval),
+        lambda: _arun(question, chat_history, previous_retrieval)
+    )
+    return result["draft"]
+
+
+async def _arun(question: str, chat_history: List[Dict[str, str]] = None,
+                previous_retrieval: Optional[Dict[str, Any]] = None) -> GraphState:
+    inputs = _initial_state(question, chat_history, previous_retrieval)
+    try:
+        result = await get_async_app().ainvoke(inputs)
+    except Exception as e:
+        tracer.finish_run(inputs["trace_id"], error=e)
+        raise
+    _finalize(result)
+    return result
+
+
+async def abatch_workflow(
+    questions: List[str],
+    chat_histories: List[List[Dict[str, str]]] = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    tokens_per_minute: int = BATCH_TOKENS_PER_MINUTE,
+) -> AsyncIterator[Dict]:
+    """
+    여러 질문을 동시에 처리하여 끝나는 순서대로 결과를 내보냄
+    
+    Args:
+        questions: 질문 목록
+        chat_histories: 질문별 대화 기록 (None이거나 항목이 None이면 대화 기록 없음)
+        concurrency: 동시에 실행할 질문 수
+        tokens_per_minute: 모든 질문의 LLM·임베딩 호출이 함께 지킬 분당 토큰 한도 (0이면 제한 없음)
+    
+    Yields:
+        {"index": 입력 순번, "question": ..., "answer": ..., "grade": ..., "cache_hit": ..., "route": ..., "error": None}
+        실패한 질문은 answer가 빈 문자열이고 error에 오류 메시지가 들어갑니다.
+    """
+    histories = chat_histories or [None] * len(questions)
+    if len(histories) != len(questions):
+        raise ValueError("chat_histories의 길이가 questions와 다릅니다.")
+    
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute > 0 else None
+    
+    async def run(index: int, question: str, history: Optional[List[Dict[str, str]]]) -> Dict:
+        async with semaphore:
+            # 태스크마다 컨텍스트가 복사되므로 이 질문의 노드에만 적용됨
+            _batch_limiter.set(limiter)
+            try:
+                result = await _arun(question, list(history or []))
+            except Exception as e:
+                return {"index": index, "question": question, "answer": "", "grade": "",
+                        "cache_hit": False, "route": "", "error": f"{type(e).__name__}: {e}"}
+            return {"index": index, "question": question, "answer": result["draft"],
+                    "grade": result.get("grade", ""), "cache_hit": result.get("cache_hit", False),
+                    "route": result.get("route", ""), "error": None}
+    
+    tasks = [asyncio.ensure_future(run(i, q, h)) for i, (q, h) in enumerate(zip(questions, histories))]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            yield await completed
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def batch_workflow(
+    questions: List[str],
+    chat_histories: List[List[Dict[str, str]]] = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    tokens_per_minute: int = BATCH_TOKENS_PER_MINUTE,
+) -> Iterator[Dict]:
+    """
+    abatch_workflow의 동기 버전 (스크립트·야간 점검용)
+    별도 스레드의 이벤트 루프에서 실행하고, 끝나는 순서대로 결과를 내보냅니다.
+    """
+    events: "queue.Queue[Dict]" = queue.Queue()
+    
+    async def consume():
+        async for item in abatch_workflow(questions, chat_histories, concurrency, tokens_per_minute):
+            events.put({"type": "result", "item": item})
+    
+    def worker():
+        try:
+            asyncio.run(consume())
+            events.put({"type": "done"})
+        except Exception as e:
+            events.put({"type": "error", "error": e})
+    
+    threading.Thread(target=worker, daemon=True).start()
+    
+    while True:
+        event = events.get()
+        if event["type"] == "error":
+            raise event["error"]
+        if event["type"] == "done":
+            return
+        yield event["item"]
+
+
+def stream_workflow(question: str, chat_history: List[Dict[str, str]] = None,
+                    previous_retrieval: Optional[Dict[str, Any]] = None) -> Iterator[Dict]:
+    """
+    워크플로우를 실행하면서 진행 상황과 답변 토큰을 이벤트로 내보냄
     
-    inputs = {
+    이벤트 종류:
+        {"type": "progress", "node": 노드 이름}        - 노드 하나가 끝남
+        {"type": "token", "text": 토큰}                 - 초안/수정 답변의 토큰
+        {"type": "reset", "revision": n, "critique": ...} - 팩트체크 실패로 스트리밍한
+                                                          답변을 버리고 수정본을 다시 스트리밍
+        {"type": "done", "answer": 최종 답변, "grade": ..., "cache_hit": ..., "route": ..., "retrieval": ...}
+                                                        - retrieval은 다음 턴에 넘길 검색 결과 (검색하지 않았으면 None)
+    
+    실행 중 예외가 발생하면 그대로 다시 발생시킵니다.
+    대화 기록 없는 같은 질문이 이미 실행 중이면 새로 실행하지 않고 그 이벤트를 처음부터 함께 받습니다.
+    """
+    faq = _lookup_faq(question)
+    if faq:
+        yield {"type": "done", "answer": faq["answer"], "grade": "PASS", "cache_hit": True, "route": "faq",
+               "retrieval": None}
+        return
+    
+    def produce(publish: Callable[[Dict], None]):
+        config = {"configurable": {"stream_callback": publish}}
+        # 트레이스는 실제로 실행하는 요청만 시작 (합쳐진 요청은 이 함수를 실행하지 않음)
+        inputs = None
+        try:
+            inputs = _initial_state(question, chat_history, previous_retrieval)
+            result = None
+            for output in get_app().stream(inputs, config=config):
+                for node, state in output.items():
+                    if node == END:
+                        result = state
+                    else:
+                        publish({"type": "progress", "node": node})
+            _finalize(result)
+            publish({
+                "type": "done",
+                "answer": result["draft"],
+                "grade": result.get("grade", ""),
+                "cache_hit": result.get("cache_hit", False),
+                "route": result.get("route", ""),
+                "retrieval": _retrieval_snapshot(result)
+            })
+        except Exception as e:
+            if inputs is not None:
+                tracer.finish_run(inputs["trace_id"], error=e)
+            publish({"type": "error", "error": e})
+    
+    key = _coalesce_key(question, chat_history, previous_retrieval)
+    # 호출자가 이 제너레이터를 닫으면(연결 종료·Streamlit 재실행) 구독도 닫아 실행을 중단시킴
+    with closing(request_coalescer.stream(key, produce)) as events:
+        for event in events:
+            if event["type"] == "error":
+                raise event["error"]
+            # 같은 이벤트를 여러 요청이 받으므로 복사본을 전달 (호출자가 값을 꺼내 가도 다른 요청에 영향 없음)
+            yield dict(event)
+            if event["type"] == "done":
+                return
+
+
+def _lookup_faq(question: str) -> Optional[Dict]:
+    """이전 대화를 가리키지 않는 질문이면 사전 생성된 FAQ 답변을 조회"""
+    if ANAPHORA_PATTERN.search(question):
+        return None
+    faq = faq_store.match(question)
+    if faq:
+        print(f"\n📚 [FAQ] 적중 (유사도: {faq['score']:.3f}) - '{faq['question']}'")
+    return faq
+
+
+def _initial_state(question: str, chat_history: List[Dict[str, str]] = None,
+                   previous_retrieval: Optional[Dict[str, Any]] = None) -> GraphState:
+    """워크플로우 입력 상태 생성"""
+    # 대화가 길어져도 노드에는 요약 + 직전 대화만 전달
+    chat_history = compact_history(chat_history)
+    
+    return {
         "original_question": question,
         "question": question,
         "context": "",
+        "sources": [],
+        "documents": [],
+        "previous_retrieval": previous_retrieval or {},
         "draft": "",
         "critique": "",
         "grade": "",
+        "route": "",
+        "retrieval_confidence": 0.0,
         "revision_count": 0,
-        "chat_history": chat_history
+        "chat_history": chat_history,
+        "question_embedding": [],
+        "cache_hit": False,
+        "trace_id": tracer.start_run(question)
     }
-    
-    result = app.invoke(inputs)
-    return result["draft"]
+
+
+def _finalize(result: GraphState):
+    """실행 결과 후처리 - 트레이스 기록, 검증을 통과한 답변만 캐시에 저장"""
+    tracer.finish_run(result.get("trace_id"), result)
+    if not result.get("cache_hit") and result.get("grade") == "PASS" and result.get("question_embedding"):
+        answer_cache.store(result["question"], result["question_embedding"], result["draft"])
+
+
+def get_cache_stats():
+    """답변 캐시 적중/미스 통계를 반환"""
+    return answer_cache.stats()
+
+
+def get_faq_stats():
+    """FAQ 답변 적중/미스 통계를 반환"""
+    return faq_store.stats()
+
+
+def get_query_cache_stats():
+    """질문 임베딩·검색 결과 캐시 적중/미스 통계를 반환"""
+    return {"embedding": embedding_cache.stats(), "retrieval": retrieval_cache.stats()}
+
+
+def get_latency_stats():
+    """노드별 최근 지연 시간 p50/p95 (ms)를 반환"""
+    return tracer.latency_percentiles()
 
 
 # ========== 테스트 코드 ==========
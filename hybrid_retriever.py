@@ -0,0 +1,148 @@
+"""
+ZIC-TALK HR 챗봇 - 하이브리드 검색 (어휘 + 벡터)
+퇴직금, 연차유급휴가처럼 정확한 용어나 "제23조" 같은 조항 번호를 묻는 질문을 위해
+문자 n-gram BM25 인덱스를 벡터 검색과 Reciprocal Rank Fusion으로 결합합니다.
+조항 번호를 직접 언급한 질문은 임베딩 호출 없이 해당 조항을 바로 반환합니다.
+"""
+import os
+import re
+import json
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+LEXICAL_INDEX_FILE = "lexical.json"
+ARTICLE_REFERENCE_PATTERN = re.compile(r"제\s?(\d+)\s?조(?:의\s?(\d+))?")
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """단어별 문자 n-gram (한 글자 단어는 그대로 사용)"""
+    tokens = []
+    for word in re.findall(r"[가-힣A-Za-z0-9]+", text.lower()):
+        if len(word) < n:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def article_key(title: str) -> str:
+    """조항 제목에서 '제N조' / '제N조의M' 키를 추출"""
+    match = ARTICLE_REFERENCE_PATTERN.search(title)
+    if not match:
+        return ""
+    return f"제{match.group(1)}조" + (f"의{match.group(2)}" if match.group(2) else "")
+
+
+def document_key(doc: Document) -> str:
+    """문서 식별 키 (중복 제거·순위 결합용)"""
+    return doc.metadata.get("article_id") or doc.metadata.get("article_title") or doc.page_content[:50]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """여러 검색 결과 순위를 RRF 점수(Σ 1 / (rrf_k + rank))로 결합하여 상위 k개 반환"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [documents[key] for key in ordered[:k]]
+
+
+class BM25Index:
+    """조항 단위 문자 bigram BM25 인덱스"""
+
+    def __init__(self, documents: List[Document], term_freqs: List[Dict[str, int]],
+                 doc_freqs: Dict[str, int], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.term_freqs = term_freqs
+        self.doc_freqs = doc_freqs
+        self.k1 = k1
+        self.b = b
+        self.lengths = [sum(tf.values()) for tf in term_freqs]
+        self.avgdl = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.articles = {}
+        for doc in documents:
+            key = article_key(doc.metadata.get("article_title", ""))
+            if key and key not in self.articles:
+                self.articles[key] = doc
+
+    # ---------- 생성 / 저장 / 로드 ----------
+    @classmethod
+    def from_documents(cls, documents: List[Document]):
+        term_freqs = [dict(Counter(char_ngrams(doc.page_content))) for doc in documents]
+        doc_freqs = Counter()
+        for tf in term_freqs:
+            doc_freqs.update(tf.keys())
+        return cls(list(documents), term_freqs, dict(doc_freqs))
+
+    def save(self, index_dir: str, namespace: str):
+        path = os.path.join(index_dir, namespace)
+        os.makedirs(path, exist_ok=True)
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_freqs": self.doc_freqs,
+            "documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata, "term_freqs": tf}
+                for doc, tf in zip(self.documents, self.term_freqs)
+            ],
+        }
+        tmp_path = os.path.join(path, LEXICAL_INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(path, LEXICAL_INDEX_FILE))
+
+    @classmethod
+    def load(cls, index_dir: str, namespace: str):
+        """저장된 인덱스를 로드 (없으면 None)"""
+        path = os.path.join(index_dir, namespace, LEXICAL_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        documents = [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in data["documents"]]
+        term_freqs = [d["term_freqs"] for d in data["documents"]]
+        return cls(documents, term_freqs, data["doc_freqs"], data["k1"], data["b"])
+
+    # ---------- 검색 ----------
+    def idf(self, term: str) -> float:
+        """용어의 역문서 빈도 (인덱스에 없는 용어는 0)"""
+        df = self.doc_freqs.get(term, 0)
+        if not df:
+            return 0.0
+        return math.log(1 + (len(self.documents) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """BM25 점수 상위 k개 (문서, 점수)"""
+        query_terms = set(char_ngrams(query))
+        scores = []
+        for doc, tf, length in zip(self.documents, self.term_freqs, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if not freq:
+                    continue
+                norm = freq + self.k1 * (1 - self.b + self.b * length / (self.avgdl or 1))
+                score += self.idf(term) * freq * (self.k1 + 1) / norm
+            if score > 0:
+                scores.append((doc, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:k]
+
+    def lookup_articles(self, question: str) -> List[Document]:
+        """질문에 언급된 '제N조' 조항을 순서대로 반환 (인덱스에 없는 번호는 무시)"""
+        found = []
+        for match in ARTICLE_REFERENCE_PATTERN.finditer(question):
+            key = f"제{match.group(1)}조" + (f"의{match.group(2)}" if match.group(2) else "")
+            doc = self.articles.get(key)
+            if doc is not None and doc not in found:
+                found.append(doc)
+        return found
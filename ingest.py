@@ -1,87 +1,539 @@
 import os
 import re
+import sys
+import glob
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
-from pinecone import Pinecone, ServerlessSpec
 
 # 1. 환경 변수 로드
 load_dotenv()
 
 INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "company-rules")
-NAMESPACE = "rules-2025"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # pinecone | local
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+NAMESPACE = os.getenv("PINECONE_NAMESPACE", "rules-2025")
+INDEX_DIR = os.getenv("INDEX_DIR", ".index")
+NAMESPACE_STATE_FILE = os.path.join(INDEX_DIR, "namespaces.json")
+UPSERT_BATCH_SIZE = 100
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+ARTICLE_NUMBER_PATTERN = re.compile(r'제\s?\d+\s?조(의\s?\d+)?')
+HEADING_PATTERN = re.compile(r'^\s*(제\s?\d+\s?(장|절))\s*(.*?)\s*$', re.MULTILINE)  # 제N장 / 제N절 제목 줄
+CLAUSE_SPLIT_TOKENS = int(os.getenv("CLAUSE_SPLIT_TOKENS", "200"))  # 이보다 긴 조항만 항/호 청크로 분할 (청크 크기 상한)
+ARTICLES_FILE = "articles.json"
+ARTICLE_START_PATTERN = re.compile(r'^제\s?\d+\s?조')
+
+# 규정 파일 이름('인사규정_2024.txt')의 규정명 → 네임스페이스 접두어
+DEFAULT_SOURCE = "취업규칙"
+DEFAULT_VERSION = "2025"
+REGULATION_SLUGS = {"취업규칙": "rules", "인사규정": "personnel", "보수규정": "pay"}
+FILE_NAME_PATTERN = re.compile(r'^(?P<name>.+?)(?:[_\-\s]?(?P<version>(?:19|20)\d{2}))?$')
+
+
+# 마지막으로 읽은 적재 상태 파일 ((수정 시각, 크기), 내용) - 요청마다 파일을 다시 읽지 않도록
+_namespace_state_cache = (None, {})
+_namespace_state_lock = threading.Lock()
+
+
+def _load_namespace_state():
+    """
+    네임스페이스별 적재 상태 파일을 읽음 (없으면 빈 dict)
+    파일의 수정 시각·크기가 마지막으로 읽었을 때와 같으면 다시 읽지 않습니다. (다른 프로세스의 재적재는 바로 반영)
+    """
+    global _namespace_state_cache
+    try:
+        stat = os.stat(NAMESPACE_STATE_FILE)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = None
+    with _namespace_state_lock:
+        if signature is None:
+            _namespace_state_cache = (None, {})
+        elif signature != _namespace_state_cache[0]:
+            _namespace_state_cache = (signature, _read_json(NAMESPACE_STATE_FILE, {}))
+        # 호출자가 고쳐 쓰므로(bump_namespace_version) 복사본 반환
+        return dict(_namespace_state_cache[1])
+
+
+def get_namespace_version(namespace):
+    """
+    네임스페이스의 현재 적재 버전을 반환합니다.
+    재적재할 때마다 바뀌므로, 캐시 무효화 기준으로 사용합니다.
+    """
+    return _load_namespace_state().get(namespace, {}).get("version", "")
+
+
+def bump_namespace_version(namespace):
+    """적재 완료 후 네임스페이스 버전을 갱신"""
+    state = _load_namespace_state()
+    version = time.strftime("%Y%m%d%H%M%S") + f"-{time.time_ns() % 1000000:06d}"
+    state[namespace] = {"version": version}
+    _write_json(NAMESPACE_STATE_FILE, state)
+    return version
+
+
+def _chapter_name(match):
+    """' 제2장  임용 및 근로계약' → '제2장 임용 및 근로계약'"""
+    number = re.sub(r"\s", "", match.group(1))
+    name = re.sub(r"\s+", " ", match.group(3))
+    return f"{number} {name}".strip()
+
+
+def source_info(file_path):
+    """
+    파일 이름에서 규정명·버전과 적재할 네임스페이스를 정합니다.
+    '인사규정_2024.txt' → 인사규정 / 2024 / personnel-2024, 기존 'rules.txt'는 취업규칙 / rules-2025
+    영문 이름('rules_2026.txt', 'pay_2024.txt')도 같은 규정명으로 봅니다. → 취업규칙 / 2026 / rules-2026
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if stem == "rules":
+        return {"source": DEFAULT_SOURCE, "version": DEFAULT_VERSION, "namespace": NAMESPACE}
+
+    match = FILE_NAME_PATTERN.match(stem)
+    name = match.group("name").strip() or stem
+    version = match.group("version") or DEFAULT_VERSION
+    names = {slug: regulation for regulation, slug in REGULATION_SLUGS.items()}
+    name = names.get(name.lower(), name)
+    slug = REGULATION_SLUGS.get(name)
+    if slug is None:
+        # 네임스페이스에는 ASCII만 쓰도록, 등록되지 않은 한글 규정명은 해시로 대체
+        slug = name.lower() if re.fullmatch(r"[A-Za-z0-9_\-]+", name) else "reg-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return {"source": name, "version": version, "namespace": f"{slug}-{version}"}
+
+
+def iter_articles(file_path, source=None, version=None, namespace=None):
+    """
+    텍스트 파일을 한 줄씩 읽으며 '제N조' 단위 문서를 하나씩 생성합니다. (파일 전체를 메모리에 올리지 않음)
+    조항이 속한 '제N장'은 chapter 메타데이터로 남기고, 장·절 제목 줄은 본문에서 제외합니다.
+    """
+    info = source_info(file_path)
+    source = source or info["source"]
+    version = version or info["version"]
+    namespace = namespace or info["namespace"]
+
+    chapter = ""
+    lines = None
+    article_chapter = ""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            heading = HEADING_PATTERN.match(line)
+            if heading:
+                if heading.group(2) == "장":
+                    chapter = _chapter_name(heading)
+                continue
+            # 줄 맨 앞의 '제N조'가 새 조항의 시작
+            if ARTICLE_START_PATTERN.match(line):
+                if lines is not None:
+                    yield _article_document(lines, article_chapter, source, version, namespace)
+                lines = []
+                article_chapter = chapter
+            if lines is not None:
+                lines.append(line)
+    if lines is not None:
+        yield _article_document(lines, article_chapter, source, version, namespace)
+
+
+def _article_document(lines, chapter, source, version, namespace):
+    content = "\n".join(lines).strip()
+
+    # 첫 번째 줄(예: 제1조(목적))을 추출하여 메타데이터로 활용
+    title = content.split('\n')[0].strip() or "Unknown"
+
+    # 문서 객체 생성 (ID는 조항 번호 기준, 해시는 본문 기준)
+    return Document(
+        page_content=content,
+        metadata={
+            "source": f"{source}({version})",
+            "regulation": source,
+            "version": version,
+            "article_title": title,
+            "article_id": article_id(title, namespace),
+            "chunk_id": article_id(title, namespace),
+            "chapter": chapter,
+            "level": "article",
+            "content_hash": content_hash(content),
+            "category": "규정" # 필요시 카테고리 로직 추가 가능
+        }
+    )
+
 
 def parse_rules(file_path):
     """
     텍스트 파일을 읽어 '제N조' 단위로 문서를 분할합니다.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        full_text = f.read()
-
-    # 정규표현식: "제1조", "제 2 조" 등 조항 시작 패턴 감지
-    # 패턴 설명: 줄바꿈 뒤에 '제', 숫자, '조' 가 오는 경우를 기준으로 자름
-    pattern = r'(\n|^)제\s?\d+\s?조'
-    
-    # split으로 나누면 [내용, 조항제목, 내용, 조항제목...] 순서로 나옴
-    # 좀 더 쉬운 처리를 위해 '제N조' 위치를 찾아 수동으로 슬라이싱합니다.
-    matches = list(re.finditer(pattern, full_text))
-    
-    documents = []
-    for i, match in enumerate(matches):
-        start = match.start()
-        # 다음 조항 시작 전까지가 현재 조항의 내용
-        end = matches[i+1].start() if i+1 < len(matches) else len(full_text)
-        
-        content = full_text[start:end].strip()
-        
-        # 첫 번째 줄(예: 제1조(목적))을 추출하여 메타데이터로 활용
-        lines = content.split('\n')
-        title = lines[0].strip() if lines else "Unknown"
-        
-        # 문서 객체 생성
-        doc = Document(
+    return list(iter_articles(file_path))
+
+
+def split_article(doc):
+    """
+    긴 조항을 항(①②…) 단위 청크로 분할합니다. 항이 없으면 호(1. 2.) 단위로 나눕니다.
+    짧은 항/호는 CLAUSE_SPLIT_TOKENS 안에서 이웃과 합치고(경계는 항/호 단위 유지),
+    각 청크는 조항 제목을 앞에 붙여 단독으로도 의미가 통하게 하며,
+    article_id로 부모 조항을 가리킵니다. 짧은 조항은 그대로 한 청크로 사용합니다.
+    """
+    from context_builder import estimate_tokens, short_title, split_clauses
+
+    if estimate_tokens(doc.page_content) <= CLAUSE_SPLIT_TOKENS:
+        return [doc]
+
+    units = split_clauses(doc.page_content)
+    has_paragraphs = any(unit["parent"] is None for unit in units[1:])
+    groups = []
+    for i, unit in enumerate(units):
+        # 항이 있으면 항 + 딸린 호를 한 청크로, 없으면 줄(호)마다 한 청크로
+        if i == 0 or not has_paragraphs or unit["parent"] is None:
+            groups.append([])
+        groups[-1].append(unit["text"].strip())
+
+    packed = []
+    for lines in groups:
+        if packed and estimate_tokens("\n".join(packed[-1] + lines)) <= CLAUSE_SPLIT_TOKENS:
+            packed[-1].extend(lines)
+        else:
+            packed.append(list(lines))
+    groups = packed
+    if len(groups) < 2:
+        return [doc]
+
+    title = short_title(doc.metadata["article_title"])
+    chunks = []
+    for n, lines in enumerate(groups):
+        text = "\n".join(lines)
+        content = text if n == 0 else f"{title} {text}"
+        chunks.append(Document(
             page_content=content,
             metadata={
-                "source": "취업규칙(2025)",
-                "article_title": title,
-                "category": "규정" # 필요시 카테고리 로직 추가 가능
+                **doc.metadata,
+                "chunk_id": f"{doc.metadata['article_id']}-{n}",
+                "level": "clause",
+                "clause": n,
+                "content_hash": content_hash(content),
             }
-        )
-        documents.append(doc)
-        
-    return documents
-
-def ingest_data():
-    print(f"🚀 데이터 파싱 시작... (Namespace: {NAMESPACE})")
-    
-    # 1. 데이터 파싱
-    file_path = "rules.txt"
-    if not os.path.exists(file_path):
-        print("❌ rules.txt 파일이 없습니다.")
-        return
-
-    docs = parse_rules(file_path)
-    print(f"✅ 총 {len(docs)}개의 조항(Chunk)으로 분할되었습니다.")
-    print(f"   - 예시: {docs[0].page_content[:50]}...")
-
-    # 2. 임베딩 모델 준비
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
-    # 3. Pinecone에 업로드 (LangChain Wrapper 사용)
-    # 기존 데이터 충돌 방지를 위해, 해당 네임스페이스를 비우는 로직은 Pinecone 클라이언트로 직접 처리하거나
-    # 덮어쓰기 로직을 고민해야 합니다. 여기서는 Upsert 방식으로 진행합니다.
-    
-    print("📡 Pinecone 업로드 중...")
-    
-    vector_store = PineconeVectorStore.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        index_name=INDEX_NAME,
-        namespace=NAMESPACE
+        ))
+    return chunks
+
+
+def build_chunks(articles):
+    """조항 목록을 검색용 청크(짧은 조항은 조항 그대로, 긴 조항은 항/호)로 펼침"""
+    return [chunk for doc in articles for chunk in split_article(doc)]
+
+
+def save_articles(articles, namespace=NAMESPACE):
+    """청크 검색 후 부모 조항으로 확장할 수 있도록 조항 원문을 저장"""
+    _write_json(os.path.join(INDEX_DIR, namespace, ARTICLES_FILE), [
+        {"page_content": doc.page_content, "metadata": doc.metadata} for doc in articles
+    ])
+
+
+def load_articles(namespace=NAMESPACE):
+    """저장된 조항 원문 {조항 ID: Document} (없으면 빈 dict)"""
+    data = _read_json(os.path.join(INDEX_DIR, namespace, ARTICLES_FILE), [])
+    return {
+        item["metadata"]["article_id"]: Document(page_content=item["page_content"], metadata=item["metadata"])
+        for item in data
+    }
+
+
+def article_id(title, namespace=NAMESPACE):
+    """
+    조항 제목에서 안정적인 벡터 ID를 만듭니다.
+    제목 첫 줄에는 본문이 섞여 있으므로 '제N조(의M)' 번호만 키로 사용해,
+    내용이 개정되어도 같은 조항은 같은 ID를 유지합니다.
+    """
+    match = ARTICLE_NUMBER_PATTERN.search(title)
+    key = re.sub(r"\s", "", match.group(0)) if match else title.strip()
+    digest = hashlib.sha1(f"{namespace}:{key}".encode("utf-8")).hexdigest()[:16]
+    return f"art-{digest}"
+
+
+def content_hash(text):
+    """조항 본문의 내용 해시 (변경 감지용)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    """임시 파일에 쓴 뒤 교체하여 중단되어도 파일이 깨지지 않도록 저장"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def manifest_path(namespace):
+    """백엔드별 매니페스트 경로 (백엔드를 바꾸면 처음부터 다시 적재)"""
+    return os.path.join(INDEX_DIR, namespace, f"manifest-{VECTOR_BACKEND}.json")
+
+
+def load_manifest(namespace):
+    """마지막 적재 시점의 {청크 ID: {title, hash, article_id}} 목록 (없으면 None)"""
+    return _read_json(manifest_path(namespace), None)
+
+
+def load_article_titles(namespace=NAMESPACE, file_path="rules.txt"):
+    """
+    적재된 조항 제목 목록을 반환합니다.
+    매니페스트가 있으면 그것을, 없으면 원문 파일을 파싱하여 사용합니다.
+    """
+    manifest = load_manifest(namespace)
+    if manifest:
+        # 항/호 청크는 부모 조항 제목을 공유하므로 중복 제거
+        return list(dict.fromkeys(entry["title"] for entry in manifest.values()))
+    if os.path.exists(file_path):
+        return [doc.metadata["article_title"] for doc in parse_rules(file_path)]
+    return []
+
+
+class EmbeddingCache:
+    """
+    내용 해시 → 임베딩 벡터 로컬 캐시 (네임스페이스·임베딩 모델별 파일)
+    변경되지 않은 조항은 다시 임베딩하지 않습니다.
+    """
+
+    def __init__(self, namespace=NAMESPACE, model=EMBEDDING_MODEL):
+        self.path = os.path.join(INDEX_DIR, namespace, f"embeddings-{model}.json")
+        self.vectors = _read_json(self.path, {})
+        self.dirty = False
+
+    def get(self, key):
+        return self.vectors.get(key)
+
+    def put(self, key, vector):
+        self.vectors[key] = vector
+        self.dirty = True
+
+    def prune(self, keep_keys):
+        """현재 조항에서 쓰이지 않는 벡터를 제거"""
+        stale = set(self.vectors) - set(keep_keys)
+        for key in stale:
+            del self.vectors[key]
+        if stale:
+            self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            _write_json(self.path, self.vectors)
+            self.dirty = False
+
+
+def discover_sources(patterns):
+    """파일·디렉터리(안의 *.txt)·glob 패턴 목록을 규정 파일 경로로 펼침 (중복 제거, 이름순)"""
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths = sorted(glob.glob(os.path.join(pattern, "*.txt")))
+        elif glob.has_magic(pattern):
+            paths = sorted(glob.glob(pattern))
+        else:
+            paths = [pattern] if os.path.exists(pattern) else []
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def _retry(func):
+    """한도 초과·일시적 오류(429/5xx/연결 오류)는 지수 백오프로 다시 시도"""
+    from rate_limiter import call_with_retry, is_retryable_error
+    return call_with_retry(func, max_retries=INGEST_MAX_RETRIES, should_retry=is_retryable_error)
+
+
+def _pinecone_index():
+    from pinecone import Pinecone
+    return Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(INDEX_NAME)
+
+
+def _process_batch(items, embeddings, index, namespace):
+    """
+    배치 하나를 처리: 캐시에 없는 청크만 임베딩하고, 업로드 대상은 바로 Pinecone에 upsert
+
+    Args:
+        items: [(청크, 업로드 여부, 캐시된 벡터 또는 None), ...]
+
+    Returns:
+        새로 임베딩한 {내용 해시: 벡터}
+    """
+    missing = {}
+    for chunk, _, vector in items:
+        if vector is None:
+            missing.setdefault(chunk.metadata["content_hash"], chunk.page_content)
+
+    new_vectors = {}
+    if missing:
+        vectors = _retry(lambda: embeddings.embed_documents(list(missing.values())))
+        new_vectors = dict(zip(missing.keys(), vectors))
+
+    upserts = [
+        {
+            "id": chunk.metadata["chunk_id"],
+            "values": vector or new_vectors[chunk.metadata["content_hash"]],
+            "metadata": {**chunk.metadata, "text": chunk.page_content},
+        }
+        for chunk, upload, vector in items if upload
+    ]
+    for i in range(0, len(upserts), UPSERT_BATCH_SIZE):
+        part = upserts[i:i + UPSERT_BATCH_SIZE]
+        _retry(lambda: index.upsert(vectors=part, namespace=namespace))
+    return new_vectors
+
+
+def ingest_source(file_path, embeddings, namespace=None, batch_size=EMBED_BATCH_SIZE, concurrency=EMBED_CONCURRENCY):
+    """
+    규정 파일 하나를 자신의 네임스페이스로 적재합니다.
+
+    조항을 읽는 대로 청크로 나눠 batch_size개씩 묶고, 최대 concurrency개 배치를 동시에 임베딩합니다.
+    Pinecone은 배치마다 임베딩이 끝나는 즉시 업로드하므로 임베딩과 업로드가 겹쳐 진행되고,
+    진행 중인 배치 수를 제한하여 파일이 커져도 대기 중인 벡터가 쌓이지 않습니다.
+    이전 적재분(매니페스트)과 내용 해시가 같은 청크는 임베딩·업로드하지 않습니다.
+
+    메모리가 일정한 것은 파일 읽기와 임베딩·업로드 대기열뿐입니다. BM25 인덱스·조항 원문(articles.json)·
+    로컬 인덱스·매니페스트를 만들기 위해 조항·청크 목록을 모두 들고 있고, 임베딩 캐시(JSON)도 통째로 읽으므로
+    이 부분은 규정 크기(청크 수 × 임베딩 차원)에 비례합니다.
+    """
+    info = source_info(file_path)
+    namespace = namespace or info["namespace"]
+    print(f"\n🚀 {info['source']}({info['version']}) 적재 시작... ({file_path} → Namespace: {namespace})")
+
+    manifest = load_manifest(namespace)
+    cache = EmbeddingCache(namespace)
+    index = None
+    if VECTOR_BACKEND != "local":
+        index = _pinecone_index()
+        if manifest is None:
+            # 매니페스트가 없던 기존 적재분(무작위 ID)은 추적할 수 없으므로 네임스페이스를 비우고 다시 올림
+            _retry(lambda: index.delete(delete_all=True, namespace=namespace))
+
+    articles, chunks = [], []
+    counts = {"added": 0, "changed": 0, "unchanged": 0, "embedded": 0}
+    changed_articles = set()
+    batch = []
+    inflight = deque()
+
+    def collect(limit):
+        while len(inflight) > limit:
+            for key, vector in inflight.popleft().result().items():
+                cache.put(key, vector)
+                counts["embedded"] += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ingest") as pool:
+        for article in iter_articles(file_path, namespace=namespace):
+            articles.append(article)
+            for chunk in split_article(article):
+                chunks.append(chunk)
+                previous = (manifest or {}).get(chunk.metadata["chunk_id"])
+                if previous is None:
+                    status = "added"
+                elif previous["hash"] != chunk.metadata["content_hash"]:
+                    status = "changed"
+                else:
+                    status = "unchanged"
+                counts[status] += 1
+                if status != "unchanged":
+                    changed_articles.add(chunk.metadata["article_id"])
+
+                upload = index is not None and (manifest is None or status != "unchanged")
+                vector = cache.get(chunk.metadata["content_hash"])
+                if upload or vector is None:
+                    batch.append((chunk, upload, vector))
+                if len(batch) >= batch_size:
+                    inflight.append(pool.submit(_process_batch, batch, embeddings, index, namespace))
+                    batch = []
+                    collect(concurrency * 2)
+        if batch:
+            inflight.append(pool.submit(_process_batch, batch, embeddings, index, namespace))
+        collect(0)
+
+    current_ids = {chunk.metadata["chunk_id"] for chunk in chunks}
+    removed = [chunk_id for chunk_id in (manifest or {}) if chunk_id not in current_ids]
+    if index is not None and removed and manifest is not None:
+        for i in range(0, len(removed), UPSERT_BATCH_SIZE):
+            part = removed[i:i + UPSERT_BATCH_SIZE]
+            _retry(lambda: index.delete(ids=part, namespace=namespace))
+    changed_articles.update(manifest[chunk_id].get("article_id", chunk_id) for chunk_id in removed)
+
+    cache.prune(chunk.metadata["content_hash"] for chunk in chunks)
+    cache.save()
+    print(f"✅ 총 {len(articles)}개의 조항, {len(chunks)}개의 청크(긴 조항은 항/호 단위)로 분할되었습니다.")
+    print(
+        f"🧮 변경 분석: 추가 {counts['added']} · 변경 {counts['changed']} · "
+        f"삭제 {len(removed)} · 유지 {counts['unchanged']}"
     )
-    
-    print("🎉 업로드 완료!")
+    print(f"🧠 새로 임베딩한 청크: {counts['embedded']}건 (나머지는 캐시 사용)")
+
+    # 어휘(BM25) 인덱스와 부모 조항 원문 - 임베딩 호출 없이 항상 최신 원문으로 다시 만듦
+    from hybrid_retriever import BM25Index
+    BM25Index.from_documents(chunks).save(INDEX_DIR, namespace)
+    save_articles(articles, namespace)
+    print("🔤 어휘(BM25) 인덱스 생성 완료")
+
+    if VECTOR_BACKEND == "local":
+        from local_index import LocalVectorIndex
+
+        print(f"💾 로컬 인덱스 생성 중... ({INDEX_DIR})")
+        LocalVectorIndex.from_embeddings(
+            chunks, [cache.get(chunk.metadata["content_hash"]) for chunk in chunks], INDEX_DIR, namespace
+        )
+
+    result = {"namespace": namespace, "articles": len(articles), "chunks": len(chunks), "removed": len(removed),
+              **counts}
+    if manifest is not None and not changed_articles:
+        print("✨ 변경된 조항이 없습니다. 버전을 유지합니다.")
+        return result
+
+    # 매니페스트 저장 및 버전 갱신 (답변 캐시 무효화)
+    _write_json(manifest_path(namespace), {
+        chunk.metadata["chunk_id"]: {
+            "title": chunk.metadata["article_title"],
+            "hash": chunk.metadata["content_hash"],
+            "article_id": chunk.metadata["article_id"],
+        }
+        for chunk in chunks
+    })
+    result["version"] = bump_namespace_version(namespace)
+    print(f"🎉 업로드 완료! (버전: {result['version']})")
+
+    # 인용 조항이 바뀐 FAQ 답변만 다시 생성 (나머지는 새 버전으로 계속 사용)
+    if namespace == NAMESPACE:
+        from faq_store import refresh_faq_answers
+        refresh_faq_answers(changed_articles)
+    return result
+
+
+def ingest_data(paths=None):
+    """
+    규정 파일을 적재합니다.
+
+    Args:
+        paths: 파일·디렉터리·glob 패턴 목록 (없으면 rules.txt)
+               파일마다 이름에서 정한 네임스페이스(규정명-버전)로 차례로 적재합니다.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    files = list(discover_sources(paths or ["rules.txt"]))
+    if not files:
+        print("❌ 적재할 규정 파일이 없습니다.")
+        return []
+
+    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    return [ingest_source(path, embeddings) for path in files]
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    ingest_data(sys.argv[1:] or None)
@@ -0,0 +1,342 @@
+"""
+ZIC-TALK HR 챗봇 - 동시 사용자 부하 테스트
+여러 직원이 동시에 여러 턴의 대화를 나누는 상황을 재현하여, 배포 하나가 감당할 수 있는
+동시 사용자 수와 지연이 급격히 늘어나는 지점(knee)을 찾습니다.
+
+- 사용자 1명 = 스레드 1개: 대화 시나리오를 골라 질문 → 답변 → 생각 시간(지수분포) → 다음 질문을 반복
+- 동시 사용자 수를 단계별로 늘리며(--users 1,5,10,20) 단계마다 --duration초 동안 실행
+- 단계별 처리량, 대기(큐) 지연, 응답 지연 p50/p95/p99, 첫 토큰 지연, 오류율을 보고
+- 대상:
+    inproc  app.py처럼 graph.stream_workflow를 직접 호출 (가짜 모델·인메모리 인덱스, 서비스 시간 분포 설정 가능)
+            --workers를 주면 그 수만큼만 동시에 실행하고 나머지는 대기 (0이면 Streamlit처럼 사용자마다 바로 실행)
+    http    실행 중인 server.py의 POST /chat 호출 (사용자마다 세션 ID 사용)
+- 결과를 JSON으로 저장하고 --baseline과 비교하여 용량이 줄었으면 종료 코드 1
+
+사용법:
+    python loadtest.py --users 1,5,10,20 --duration 30 --llm-latency 0.8 --distribution lognormal --output load.json
+    python loadtest.py --users 1,5,10,20 --workers 8 --baseline load.json
+    SERVER_FAKE_MODELS=1 uvicorn server:app &
+    python loadtest.py --target http --url http://localhost:8000 --users 5,10,20
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from bench import DISTRIBUTIONS, _percentile, setup_offline_components
+
+import graph
+from conversation_memory import ConversationMemory
+
+# ========== 대화 시나리오 ==========
+# 사용자는 시나리오 하나를 끝까지 진행한 뒤 새 대화(빈 기록)로 다른 시나리오를 시작
+CONVERSATIONS = [
+    ["연차는 얼마나 주나요?", "그럼 월차는?", "연차를 다 못 쓰면 어떻게 되나요?"],
+    ["육아기 근로시간 단축 조건이 어떻게 되나요?", "신청은 언제까지 해야 하나요?"],
+    ["병가는 며칠까지 쓸 수 있나요?", "그 기간에 급여는 나오나요?"],
+    ["퇴직 절차는 어떻게 되나요?", "사직서는 언제까지 내야 하나요?", "인수인계는요?"],
+    ["징계 절차는 어떻게 되나요?", "징계 종류는 뭐가 있나요?"],
+    ["제26조 내용을 알려주세요"],
+]
+
+KNEE_FACTOR = 2.0  # 첫 단계 p95의 몇 배를 넘으면 포화로 볼지
+KNEE_ERROR_RATE = 0.01
+
+
+# ========== 요청 실행 ==========
+class InProcessTarget:
+    """graph.stream_workflow를 직접 호출 (app.py와 같은 경로)"""
+
+    name = "inproc"
+
+    def __init__(self, workers: int = 0):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") if workers > 0 else None
+
+    def new_session(self) -> ConversationMemory:
+        return ConversationMemory()
+
+    def _run(self, memory: ConversationMemory, question: str, submitted: float) -> Dict:
+        started = time.perf_counter()
+        first_token = None
+        for event in graph.stream_workflow(question, memory.to_history(), memory.last_retrieval):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter()
+            elif event["type"] == "done":
+                memory.add_exchange(question, event["answer"], event.get("retrieval"))
+                finished = time.perf_counter()
+                return {
+                    "queue_s": started - submitted,
+                    "ttft_s": (first_token or finished) - submitted,
+                    "cache_hit": event.get("cache_hit", False),
+                    "route": event.get("route", ""),
+                }
+        raise RuntimeError("done 이벤트 없이 스트림이 끝났습니다.")
+
+    def ask(self, memory: ConversationMemory, question: str) -> Dict:
+        submitted = time.perf_counter()
+        if self.pool is None:
+            return self._run(memory, question, submitted)
+        return self.pool.submit(self._run, memory, question, submitted).result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+
+class HttpTarget:
+    """server.py의 POST /chat 호출 (대기 지연은 서버가 응답에 넣은 queue_ms 사용)"""
+
+    name = "http"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def new_session(self) -> str:
+        return f"load-{uuid.uuid4().hex}"
+
+    def ask(self, session_id: str, question: str) -> Dict:
+        body = json.dumps({"question": question, "session_id": session_id}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.url}/chat", data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            result = json.loads(response.read().decode("utf-8"))
+        return {
+            "queue_s": result.get("queue_ms", 0.0) / 1000,
+            "ttft_s": None,
+            "cache_hit": result.get("cache_hit", False),
+            "route": result.get("route", ""),
+        }
+
+    def close(self):
+        pass
+
+
+def _error_kind(error: BaseException) -> str:
+    if isinstance(error, urllib.error.HTTPError):
+        return f"HTTP {error.code}"
+    if isinstance(error, (TimeoutError, urllib.error.URLError)) and "timed out" in str(error):
+        return "timeout"
+    return type(error).__name__
+
+
+# ========== 부하 단계 ==========
+def run_level(target, users: int, duration: float, think_time: float, timeout: float, seed: int) -> Dict:
+    """
+    사용자 users명을 duration초 동안 실행하여 지표를 집계
+
+    마감 시각 이후에는 새 질문을 보내지 않고, 진행 중인 질문이 끝날 때까지 기다립니다.
+    시작이 한꺼번에 몰리지 않도록 사용자마다 0~think_time초 사이에 첫 질문을 보냅니다.
+    """
+    samples: List[Dict] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        time.sleep(rng.uniform(0, think_time))
+        while time.perf_counter() < deadline:
+            session = target.new_session()
+            for question in rng.choice(CONVERSATIONS):
+                if time.perf_counter() >= deadline:
+                    return
+                submitted = time.perf_counter()
+                try:
+                    sample = target.ask(session, question)
+                    sample["latency_s"] = time.perf_counter() - submitted
+                    if sample["latency_s"] > timeout:
+                        raise TimeoutError(f"{timeout:.0f}초 초과 ({sample['latency_s']:.1f}초)")
+                except Exception as e:
+                    kind = "timeout" if isinstance(e, TimeoutError) else _error_kind(e)
+                    with lock:
+                        errors[kind] = errors.get(kind, 0) + 1
+                    # 오류가 난 대화는 이어가지 않고 새 대화를 시작
+                    break
+                with lock:
+                    samples.append(sample)
+                if think_time > 0:
+                    time.sleep(rng.expovariate(1 / think_time))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = [sample["latency_s"] for sample in samples]
+    queues = [sample["queue_s"] for sample in samples]
+    ttfts = [sample["ttft_s"] for sample in samples if sample["ttft_s"] is not None]
+    failed = sum(errors.values())
+    total = len(samples) + failed
+
+    def ms(values: List[float], q: float) -> float:
+        return round(_percentile(values, q) * 1000, 1)
+
+    routes: Dict[str, int] = {}
+    for sample in samples:
+        routes[sample["route"]] = routes.get(sample["route"], 0) + 1
+    return {
+        "users": users,
+        "requests": total,
+        "completed": len(samples),
+        "errors": errors,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 2) if wall > 0 else 0.0,
+        "latency_p50_ms": ms(latencies, 0.5),
+        "latency_p95_ms": ms(latencies, 0.95),
+        "latency_p99_ms": ms(latencies, 0.99),
+        "queue_p50_ms": ms(queues, 0.5),
+        "queue_p95_ms": ms(queues, 0.95),
+        "ttft_p50_ms": ms(ttfts, 0.5),
+        "ttft_p95_ms": ms(ttfts, 0.95),
+        "cache_hit_rate": round(sum(sample["cache_hit"] for sample in samples) / max(len(samples), 1), 3),
+        "routes": routes,
+    }
+
+
+def find_knee(levels: List[Dict]) -> Optional[int]:
+    """p95가 첫 단계의 KNEE_FACTOR배를 넘거나 오류율이 KNEE_ERROR_RATE를 넘는 첫 동시 사용자 수"""
+    if not levels:
+        return None
+    base = levels[0]["latency_p95_ms"]
+    for level in levels[1:]:
+        if level["latency_p95_ms"] > base * KNEE_FACTOR or level["error_rate"] > KNEE_ERROR_RATE:
+            return level["users"]
+    return None
+
+
+def compare_with_baseline(levels: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """같은 동시 사용자 수끼리 비교하여 처리량 감소·p95 증가·오류율 증가를 찾음"""
+    previous = {level["users"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in levels:
+        before = previous.get(level["users"])
+        if before is None:
+            continue
+        users = level["users"]
+        if level["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{users}명: 처리량 {before['throughput_rps']} → {level['throughput_rps']} rps")
+        if level["latency_p95_ms"] > before["latency_p95_ms"] * (1 + tolerance):
+            regressions.append(f"{users}명: p95 {before['latency_p95_ms']} → {level['latency_p95_ms']}ms")
+        if level["error_rate"] > before["error_rate"] + KNEE_ERROR_RATE:
+            regressions.append(f"{users}명: 오류율 {before['error_rate']:.1%} → {level['error_rate']:.1%}")
+    return regressions
+
+
+def print_report(levels: List[Dict], target: str):
+    print(f"\n📈 부하 테스트 결과 ({target})")
+    print(
+        f"   {'사용자':>6}{'요청':>7}{'오류율':>8}{'처리량':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'대기p95':>9}{'TTFT p95':>10}{'캐시':>7}"
+    )
+    for level in levels:
+        print(
+            f"   {level['users']:>6}{level['requests']:>7}{level['error_rate']:>8.1%}"
+            f"{level['throughput_rps']:>9}{level['latency_p50_ms']:>9}{level['latency_p95_ms']:>9}"
+            f"{level['latency_p99_ms']:>9}{level['queue_p95_ms']:>9}{level['ttft_p95_ms']:>10}"
+            f"{level['cache_hit_rate']:>7.0%}"
+        )
+        if level["errors"]:
+            print(f"          오류: {', '.join(f'{kind} {count}건' for kind, count in level['errors'].items())}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ZIC-TALK 동시 사용자 부하 테스트")
+    parser.add_argument("--target", choices=["inproc", "http"], default="inproc")
+    parser.add_argument("--url", default="http://localhost:8000", help="http 대상의 서버 주소")
+    parser.add_argument("--users", default="1,5,10,20", help="단계별 동시 사용자 수 (쉼표로 구분)")
+    parser.add_argument("--duration", type=float, default=30.0, help="단계별 실행 시간(초)")
+    parser.add_argument("--think-time", type=float, default=5.0, help="답변을 읽고 다음 질문까지의 평균 시간(초)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="이 시간을 넘긴 응답은 오류로 집계(초)")
+    parser.add_argument("--workers", type=int, default=0, help="inproc 동시 실행 상한 (0 = 사용자마다 바로 실행)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="LLM 호출당 평균 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="스트리밍 토큰당 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="임베딩 호출당 평균 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="벡터 검색당 평균 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="uniform은 변동 비율, lognormal은 로그 표준편차")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal", help="서비스 시간 분포")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--use-cache", action="store_true", help="단계 사이에 답변·임베딩·검색 캐시를 비우지 않음")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON (용량이 줄었으면 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="기준 대비 허용 변화율 (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    user_levels = [int(value) for value in args.users.split(",") if value.strip()]
+
+    if args.target == "inproc":
+        setup_offline_components(
+            llm_latency=args.llm_latency,
+            embed_latency=args.embed_latency,
+            jitter=args.jitter,
+            token_latency=args.token_latency,
+            seed=args.seed,
+            distribution=args.distribution,
+            search_latency=args.search_latency,
+        )
+        graph.warm_up()
+        target = InProcessTarget(args.workers)
+    else:
+        target = HttpTarget(args.url, args.timeout)
+
+    levels = []
+    # 노드 로그(print)는 결과 출력과 섞이지 않도록 숨김
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    try:
+        for users in user_levels:
+            if args.target == "inproc" and not args.use_cache:
+                graph.answer_cache.clear()
+                graph.embedding_cache.clear()
+                graph.retrieval_cache.clear()
+            stdout.write(f"⏳ 동시 사용자 {users}명 ({args.duration:.0f}초)...\n")
+            stdout.flush()
+            levels.append(run_level(target, users, args.duration, args.think_time, args.timeout, args.seed))
+    finally:
+        target.close()
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print_report(levels, args.target)
+    knee = find_knee(levels)
+    if knee is None:
+        print(f"\n✅ 측정한 범위에서 포화 지점 없음 (p95 {KNEE_FACTOR:.0f}배·오류율 {KNEE_ERROR_RATE:.0%} 기준)")
+    else:
+        print(f"\n⚠️  포화 지점: 동시 사용자 {knee}명 (p95가 {KNEE_FACTOR:.0f}배를 넘거나 오류율 {KNEE_ERROR_RATE:.0%} 초과)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": vars(args),
+                "knee_users": knee,
+                "levels": levels,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(levels, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ 기준({args.baseline}) 대비 용량 감소:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"✅ 기준({args.baseline}) 대비 허용 범위 안 (±{args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+ZIC-TALK HR 챗봇 - 로컬 벡터 인덱스
+조항 수가 적은 규정집을 위해 임베딩을 NumPy 행렬로 디스크에 저장하고,
+시작 시 메모리 맵으로 불러와 네트워크 없이 코사인 유사도 검색을 수행합니다.
+PineconeVectorStore와 같은 Document/메타데이터 형태를 반환합니다.
+"""
+import os
+import json
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+MATRIX_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+class LocalRetriever:
+    """vector_store.as_retriever()와 같은 방식으로 쓰는 로컬 검색기"""
+
+    def __init__(self, index: "LocalVectorIndex", k: int = 4):
+        self.index = index
+        self.k = k
+
+    def invoke(self, query: str) -> List[Document]:
+        return self.index.similarity_search(query, k=self.k)
+
+
+class LocalVectorIndex:
+    """정규화된 임베딩 행렬 + 문서 목록으로 구성된 인메모리 인덱스"""
+
+    def __init__(self, matrix: np.ndarray, documents: List[Document], embedding=None):
+        self.matrix = matrix
+        self.documents = documents
+        self.embedding = embedding
+
+    # ---------- 생성 / 저장 / 로드 ----------
+    @staticmethod
+    def index_path(index_dir: str, namespace: str) -> str:
+        """네임스페이스별 인덱스 저장 경로"""
+        return os.path.join(index_dir, namespace)
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], embedding, index_dir: str, namespace: str):
+        """문서를 임베딩하여 인덱스를 만들고 디스크에 저장"""
+        vectors = embedding.embed_documents([doc.page_content for doc in documents])
+        return cls.from_embeddings(documents, vectors, index_dir, namespace, embedding)
+
+    @classmethod
+    def from_embeddings(cls, documents: List[Document], vectors, index_dir: str = None, namespace: str = None,
+                        embedding=None):
+        """이미 계산된 임베딩으로 인덱스를 생성 (index_dir이 없으면 디스크에 저장하지 않음)"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(documents):
+            raise ValueError("임베딩 개수와 문서 개수가 일치하지 않습니다.")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        if index_dir is not None:
+            path = cls.index_path(index_dir, namespace)
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, MATRIX_FILE), matrix)
+            with open(os.path.join(path, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+                json.dump(
+                    [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+                    f, ensure_ascii=False
+                )
+
+        return cls(matrix, list(documents), embedding)
+
+    @classmethod
+    def load(cls, index_dir: str, namespace: str, embedding=None):
+        """디스크의 인덱스를 메모리 맵으로 로드"""
+        path = cls.index_path(index_dir, namespace)
+        matrix_path = os.path.join(path, MATRIX_FILE)
+        if not os.path.exists(matrix_path):
+            raise FileNotFoundError(
+                f"로컬 인덱스가 없습니다: {path} (VECTOR_BACKEND=local 로 python ingest.py 를 먼저 실행하세요)"
+            )
+
+        matrix = np.load(matrix_path, mmap_mode="r")
+        with open(os.path.join(path, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            documents = [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in json.load(f)]
+
+        return cls(matrix, documents, embedding)
+
+    # ---------- 검색 ----------
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """쿼리 벡터와의 코사인 유사도 상위 k개 (문서, 점수)"""
+        if len(self.documents) == 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        # 전체 정렬 대신 상위 k개만 골라낸 뒤 정렬
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def as_retriever(self, search_kwargs=None) -> LocalRetriever:
+        return LocalRetriever(self, k=(search_kwargs or {}).get("k", 4))
@@ -0,0 +1,141 @@
+"""
+ZIC-TALK HR 챗봇 - 질문 임베딩·검색 결과 캐시
+같거나 거의 같은(공백·대소문자·끝 문장부호만 다른) 질문은 임베딩 API와 벡터 DB를 다시 호출하지 않습니다.
+LRU 방식으로 용량을 제한하고 TTL이 지난 항목은 버리며, 네임스페이스가 다시 적재되면 전체를 비웁니다.
+persist=True이면 로컬 디스크(INDEX_DIR)에 저장하여 Streamlit을 재시작해도 유지됩니다.
+(저장은 백그라운드 스레드에서 하므로 요청 처리 중에 캐시 전체를 직렬화하지 않습니다.)
+"""
+import os
+import re
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ingest import INDEX_DIR, _read_json, _write_json, get_namespace_version
+
+SAVE_INTERVAL = 30.0  # 디스크 저장 최소 간격(초) - 매 요청마다 파일을 쓰지 않도록
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질문 정규화 (공백 통일, 소문자, 끝 문장부호 제거)"""
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return re.sub(r"[\s?？!.。~]+$", "", text)
+
+
+class QueryCache:
+    """
+    TTL + LRU 캐시 (값은 JSON으로 저장할 수 있어야 함)
+
+    - ttl초가 지난 항목은 조회 시 제거합니다.
+    - 용량(max_size)을 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    - 네임스페이스 적재 버전이 바뀌면 전체가 무효화됩니다.
+    """
+
+    def __init__(self, name: str, namespace: str, max_size: int = 1024, ttl: float = 3600.0,
+                 persist: bool = False):
+        self.name = name
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = os.path.join(INDEX_DIR, namespace, f"{name}_cache.json") if persist else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._version = get_namespace_version(namespace)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self._saving = False  # 백그라운드 저장 진행 중
+        self._save_lock = threading.Lock()  # 파일 쓰기는 한 번에 하나씩 (종료 시 저장과 겹치지 않도록)
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    # ---------- 디스크 ----------
+    def _load(self):
+        data = _read_json(self.path, {})
+        if data.get("version") != self._version:
+            return
+        now = time.time()
+        for key, entry in data.get("entries", []):
+            if now - entry["at"] < self.ttl:
+                self._entries[key] = entry
+
+    def save(self):
+        """변경된 내용이 있으면 디스크에 저장"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # 항목은 교체만 하고 고쳐 쓰지 않으므로 목록만 복사하면 lock 밖에서 직렬화해도 안전
+                data = {"version": self._version, "entries": list(self._entries.items())}
+                self._dirty = False
+                self._saved_at = time.time()
+            try:
+                _write_json(self.path, data)
+            except OSError as e:
+                print(f"⚠️  [{self.name} 캐시] 저장 실패: {e}")
+
+    def _save_in_background(self):
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                self._saving = False
+
+    # ---------- 조회 / 저장 ----------
+    def _check_version(self):
+        """적재 버전이 바뀌었으면 캐시를 비움 (lock 안에서 호출)"""
+        version = get_namespace_version(self.namespace)
+        if version != self._version:
+            if self._entries:
+                print(f"   ♻️  [{self.name} 캐시] '{self.namespace}' 재적재 감지 - {len(self._entries)}건 무효화")
+            self._entries.clear()
+            self._version = version
+            self._dirty = True
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["at"] >= self.ttl:
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = {"value": value, "at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = self.path and not self._saving and time.time() - self._saved_at >= SAVE_INTERVAL
+            if due:
+                self._saving = True
+        if due:
+            threading.Thread(target=self._save_in_background, name=f"{self.name}-cache-save", daemon=True).start()
+
+    def clear(self):
+        """캐시와 통계를 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._dirty = True
+
+    def stats(self) -> Dict[str, int]:
+        """적중/미스 횟수와 현재 크기"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,259 @@
+"""
+ZIC-TALK HR 챗봇 - 분당 토큰(TPM) 제한, 동시 호출 제한과 재시도
+여러 질문을 한꺼번에 처리할 때 LLM 호출이 API 할당량을 넘지 않도록 토큰 버킷으로 조절하고,
+한도 초과(429) 응답은 지수 백오프로 다시 시도합니다. (적재 스크립트도 같은 재시도를 사용)
+프로세스 전체의 동시 LLM 호출 수도 제한하여, 요청이 몰릴 때 API 쪽 속도 제한에 걸리기 전에
+대기열이 넘치는 요청은 바로 거절합니다.
+"""
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """API 한도 초과(429 / RateLimitError) 여부"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429 or type(error).__name__ == "RateLimitError":
+        return True
+    return "rate limit" in str(error).lower()
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """한도 초과 또는 일시적 오류(5xx, 연결·시간 초과)"""
+    if is_rate_limit_error(error) or isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+class TokenRateLimiter:
+    """
+    분당 토큰 한도를 지키는 토큰 버킷 (asyncio 전용)
+
+    - 호출 전에 예상 토큰을 acquire()로 확보하고, 버킷이 비어 있으면 채워질 때까지 기다립니다.
+    - 응답을 받으면 settle()로 예상치와 실제 사용량의 차이를 반영합니다. (초과분은 다음 호출이 기다림)
+    - 한도 초과 응답을 받으면 penalize()로 버킷을 비워 다른 호출도 잠시 멈추게 합니다.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int):
+        # 한 번에 버킷보다 큰 요청은 버킷 전체를 쓰는 것으로 취급 (영원히 기다리지 않도록)
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def settle(self, estimated: int, actual: int):
+        """예상 토큰과 실제 사용량의 차이를 반영"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + estimated - actual)
+
+    def penalize(self):
+        """한도 초과 응답을 받았을 때 버킷을 비움"""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+
+class LLMOverloadedError(RuntimeError):
+    """동시 LLM 호출 대기열이 가득 찼거나 대기 시간이 초과되어 호출을 거절함"""
+
+
+class _Waiter:
+    """대기열의 호출 하나 (스레드는 Event, 코루틴은 자기 이벤트 루프의 Future로 차례를 받음)"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self) -> bool:
+        """자리를 넘겨줌 (limiter lock 안에서 호출, 이벤트 루프가 이미 닫혔으면 False)"""
+        if self.loop is None:
+            self.granted = True
+            self.event.set()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            return False
+        self.granted = True
+        return True
+
+    def _wake(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    프로세스 전체의 동시 LLM 호출 수 제한 (스레드·이벤트 루프 공용)
+
+    - 실행 중인 호출이 max_concurrency개면 대기열에서 차례를 기다립니다. (먼저 온 순서대로)
+    - 대기열에도 max_queue개가 차 있으면 기다리지 않고 바로 LLMOverloadedError를 발생시킵니다.
+    - queue_timeout초 안에 차례가 오지 않아도 LLMOverloadedError를 발생시킵니다.
+    호출이 끝나면 자리를 대기열의 첫 호출에 바로 넘겨줍니다. 비동기 호출은 스레드를 점유하지 않고
+    자기 이벤트 루프에서 기다립니다. max_concurrency가 0 이하이면 제한하지 않습니다.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.rejected = 0
+        self._waiters: "deque[_Waiter]" = deque()
+        self._lock = threading.Lock()
+
+    def _reject(self, reason: str):
+        """lock 안에서 호출"""
+        self.rejected += 1
+        raise LLMOverloadedError(f"동시 질문이 많아 지금은 답변할 수 없습니다. 잠시 후 다시 시도해 주세요. ({reason})")
+
+    def _enqueue(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """자리가 있으면 바로 확보하고 None, 없으면 대기열에 넣은 _Waiter (lock 안에서 호출)"""
+        # 이미 기다리는 호출이 있으면 새 호출은 대기열 뒤에 섬
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self._reject(f"대기 {len(self._waiters)}건")
+        waiter = _Waiter(loop)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _give_up(self, waiter: _Waiter) -> bool:
+        """대기를 그만둠 - 그 사이 자리를 받았으면 True (lock 안에서 호출)"""
+        if waiter.granted:
+            return True
+        self._waiters.remove(waiter)
+        return False
+
+    def acquire(self) -> float:
+        """호출 자리를 확보하고 기다린 시간(초)을 반환"""
+        if self.max_concurrency <= 0:
+            return 0.0
+        started = time.monotonic()
+        with self._lock:
+            waiter = self._enqueue()
+        if waiter is None:
+            return 0.0
+        if not waiter.event.wait(self.queue_timeout):
+            with self._lock:
+                if not self._give_up(waiter):
+                    self._reject(f"{self.queue_timeout:.0f}초 대기 초과")
+        return time.monotonic() - started
+
+    async def aacquire(self) -> float:
+        """acquire()의 비동기 버전"""
+        if self.max_concurrency <= 0:
+            return 0.0
+        started = time.monotonic()
+        with self._lock:
+            waiter = self._enqueue(asyncio.get_running_loop())
+        if waiter is None:
+            return 0.0
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not self._give_up(waiter):
+                    self._reject(f"{self.queue_timeout:.0f}초 대기 초과")
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = self._give_up(waiter)
+            # 취소되기 직전에 받은 자리는 다음 호출에 넘김
+            if granted:
+                self.release()
+            raise
+        return time.monotonic() - started
+
+    def release(self):
+        if self.max_concurrency <= 0:
+            return
+        with self._lock:
+            while self._waiters:
+                if self._waiters.popleft().grant():
+                    return
+            self.active -= 1
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        """with limiter.slot() as waited: ... (waited = 기다린 시간(초))"""
+        waited = self.acquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[float]:
+        waited = await self.aacquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self.active, "waiting": len(self._waiters), "rejected": self.rejected}
+
+
+async def call_with_backoff(func: Callable[[], Awaitable[T]], max_retries: int = 5, base_delay: float = 1.0,
+                            max_delay: float = 30.0, limiter: Optional[TokenRateLimiter] = None) -> T:
+    """
+    한도 초과 오류가 나면 지수 백오프(지터 포함)로 다시 호출
+    그 밖의 오류나 재시도 횟수를 다 쓴 경우에는 예외를 그대로 발생시킵니다.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= max_retries or not is_rate_limit_error(e):
+                raise
+            if limiter is not None:
+                limiter.penalize()
+            delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            print(f"   ⏳ API 한도 초과 - {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def call_with_retry(func: Callable[[], T], max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0,
+                    should_retry: Callable[[BaseException], bool] = is_rate_limit_error) -> T:
+    """call_with_backoff의 동기 버전 (적재 스크립트의 임베딩·업로드 배치용)"""
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not should_retry(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            print(f"   ⏳ 일시적 오류({type(e).__name__}) - {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,111 @@
+"""
+ZIC-TALK HR 챗봇 - 검색 결과 재정렬 (관련도 기반 adaptive k)
+벡터 유사도와 질문 용어 포함률(또는 로컬 cross-encoder 점수)로 후보 조항의 관련도를 계산하고,
+기준에 못 미치는 조항은 버려 질문마다 프롬프트에 넣을 조항 수를 정합니다.
+관련 조항이 하나도 없으면 빈 목록을 반환하고, 그래프는 초안 작성 없이 바로 답변합니다.
+"""
+import os
+import re
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from hybrid_retriever import char_ngrams, document_key
+
+RERANKER = os.getenv("RERANKER", "lexical")  # lexical | cross-encoder | off
+RERANK_MODEL = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-base")
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.3"))
+RERANK_RELATIVE_CUTOFF = float(os.getenv("RERANK_RELATIVE_CUTOFF", "0.6"))
+RERANK_VECTOR_WEIGHT = float(os.getenv("RERANK_VECTOR_WEIGHT", "0.5"))
+
+# 재작성된 질문에 붙는 범위 표현 ("취업규칙에서 ...") - 특정 조항과 무관하므로 용어 포함률에서 제외
+SCOPE_PATTERN = re.compile(r"(취업\s?규칙|인사\s?규정|회사\s?규정|사내\s?규정|규정)(에서는|에서|에는|에|상|의)?")
+
+
+def term_coverage(question: str, text: str, idf: Optional[Callable[[str], float]] = None) -> float:
+    """
+    질문의 문자 bigram 중 문서에 들어 있는 비율 (0~1)
+    idf가 주어지면 용어별 가중치로 쓰고, 규정 전체에 없는 용어("나요", "주나" 등 어미)는 제외합니다.
+    """
+    terms = set(char_ngrams(SCOPE_PATTERN.sub(" ", question)))
+    weights = {term: idf(term) for term in terms} if idf else dict.fromkeys(terms, 1.0)
+    total = sum(weights.values())
+    if not total:
+        return 0.0
+    doc_terms = set(char_ngrams(text))
+    return sum(weight for term, weight in weights.items() if term in doc_terms) / total
+
+
+class Reranker:
+    """
+    후보 조항 재정렬
+
+    - lexical: 벡터 유사도와 용어 포함률의 가중 평균 (추가 모델 없음)
+    - cross-encoder: 로컬 cross-encoder 점수(sigmoid) - sentence-transformers가 없으면 lexical 사용
+    - off: 재정렬 없이 검색 순서대로 최대 k개 (관련도 기준 미적용)
+
+    최고 점수가 min_score 미만이면 관련 조항이 없는 것으로 보고,
+    나머지는 min_score와 최고 점수 × relative_cutoff 이상인 조항만 남깁니다.
+    """
+
+    def __init__(self, mode: str = RERANKER, min_score: float = RERANK_MIN_SCORE,
+                 relative_cutoff: float = RERANK_RELATIVE_CUTOFF, vector_weight: float = RERANK_VECTOR_WEIGHT,
+                 model_name: str = RERANK_MODEL):
+        self.mode = mode
+        self.min_score = min_score
+        self.relative_cutoff = relative_cutoff
+        self.vector_weight = vector_weight
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        """cross-encoder 모델 (처음 사용할 때 로드, 로드할 수 없으면 None)"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        self._model = CrossEncoder(self.model_name)
+                    except Exception as e:
+                        print(f"⚠️  cross-encoder를 불러올 수 없어 어휘 점수로 재정렬합니다. ({type(e).__name__}: {e})")
+                        self._model = False
+        return self._model or None
+
+    def score(self, question: str, docs: List[Document], vector_scores: Dict[str, float],
+              idf: Optional[Callable[[str], float]] = None) -> List[float]:
+        """조항별 관련도 (0~1)"""
+        model = self._get_model() if self.mode == "cross-encoder" else None
+        if model is not None:
+            logits = model.predict([(question, doc.page_content) for doc in docs])
+            return [1 / (1 + math.exp(-float(logit))) for logit in logits]
+
+        return [
+            self.vector_weight * max(0.0, vector_scores.get(document_key(doc), 0.0))
+            + (1 - self.vector_weight) * term_coverage(question, doc.page_content, idf)
+            for doc in docs
+        ]
+
+    def rerank(self, question: str, docs: List[Document], vector_scores: Dict[str, float], max_k: int,
+               idf: Optional[Callable[[str], float]] = None) -> List[Tuple[Document, float]]:
+        """
+        관련도 순으로 정렬하여 기준을 넘는 조항만 최대 max_k개 반환
+
+        Args:
+            docs: 후보 조항 (부모 조항으로 확장된 문서)
+            vector_scores: {조항 키: 벡터 유사도} (벡터 검색에 없던 조항은 0으로 취급)
+            idf: 용어 가중치 (BM25 인덱스의 idf, 없으면 모든 용어 동일)
+        """
+        if not docs:
+            return []
+        if self.mode == "off":
+            return [(doc, vector_scores.get(document_key(doc), 0.0)) for doc in docs[:max_k]]
+
+        ranked = sorted(zip(docs, self.score(question, docs, vector_scores, idf)),
+                        key=lambda item: item[1], reverse=True)
+        if ranked[0][1] < self.min_score:
+            return []
+        cutoff = max(self.min_score, ranked[0][1] * self.relative_cutoff)
+        return [(doc, score) for doc, score in ranked if score >= cutoff][:max_k]
@@ -0,0 +1,228 @@
+"""
+ZIC-TALK HR 챗봇 - HTTP API 서버 (ASGI)
+Streamlit 화면 없이 사내 포털·메신저 봇이 호출할 수 있는 JSON / SSE 엔드포인트를 제공합니다.
+대화 기록은 세션 ID별로 서버에 보관하므로 클라이언트는 질문과 세션 ID만 보내면 됩니다.
+
+- POST   /chat                 질문 → 최종 답변 (JSON)
+- POST   /chat/stream          질문 → 진행 상황·답변 토큰 (server-sent events)
+- DELETE /sessions/{session_id} 대화 초기화
+- GET    /healthz              프로세스 생존 확인
+- GET    /readyz               예열(클라이언트 생성·그래프 컴파일) 완료 여부 (준비 전 503)
+
+/chat은 비동기 그래프(graph.aanswer_question)를 이벤트 루프에서 실행하므로 동시 요청 수가 워커 수에 묶이지 않습니다.
+/chat/stream은 토큰 콜백을 받는 동기 스트림(stream_workflow)을 스레드 풀(SERVER_WORKERS)에서 실행합니다.
+요청마다 SERVER_REQUEST_TIMEOUT초를 넘기면 중단합니다.
+
+사용법:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+    SERVER_FAKE_MODELS=1 uvicorn server:app   # 가짜 모델(bench.py)로 실행 - API 키·네트워크 불필요
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, closing
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+import graph
+from rate_limiter import LLMOverloadedError
+from session_store import SessionStore
+
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "8"))
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "60"))
+SERVER_FAKE_MODELS = os.getenv("SERVER_FAKE_MODELS", "0") == "1"
+SESSION_LOCK_POLL = 0.01  # 같은 세션의 앞 질문을 기다릴 때 lock 확인 간격(초)
+# 가짜 모델 서비스 시간 (부하 테스트용, bench.DISTRIBUTIONS 참고)
+SERVER_FAKE_LLM_LATENCY = float(os.getenv("SERVER_FAKE_LLM_LATENCY", "0"))
+SERVER_FAKE_SEARCH_LATENCY = float(os.getenv("SERVER_FAKE_SEARCH_LATENCY", "0"))
+SERVER_FAKE_DISTRIBUTION = os.getenv("SERVER_FAKE_DISTRIBUTION", "uniform")
+
+executor = ThreadPoolExecutor(max_workers=SERVER_WORKERS, thread_name_prefix="chat")
+sessions = SessionStore()
+_warm_up: Optional[Future] = None
+
+
+class ChatRequest(BaseModel):
+    question: str = Field(..., min_length=1)
+    session_id: Optional[str] = None
+
+
+# ========== 예열 ==========
+def _load_engine() -> Dict[str, float]:
+    if SERVER_FAKE_MODELS:
+        from bench import setup_offline_components
+        setup_offline_components(
+            llm_latency=SERVER_FAKE_LLM_LATENCY,
+            search_latency=SERVER_FAKE_SEARCH_LATENCY,
+            distribution=SERVER_FAKE_DISTRIBUTION,
+        )
+    return graph.warm_up()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """서버 시작 시 백그라운드에서 예열 (그동안 /readyz는 503)"""
+    global _warm_up
+    _warm_up = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm-up").submit(_load_engine)
+    yield
+    executor.shutdown(wait=False)
+
+
+app = FastAPI(title="ZIC-TALK HR 챗봇 API", lifespan=lifespan)
+
+
+# ========== 상태 확인 ==========
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    if _warm_up is None or not _warm_up.done():
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    if _warm_up.exception() is not None:
+        error = _warm_up.exception()
+        return JSONResponse({"status": "error", "error": f"{type(error).__name__}: {error}"}, status_code=503)
+    if not graph.is_warmed_up():
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", "warm_up_ms": _warm_up.result(), **sessions.stats(),
+            "llm": graph.llm_limiter.stats(), "single_flight": graph.request_coalescer.stats(),
+            "faq": graph.get_faq_stats(), "query_cache": graph.get_query_cache_stats()}
+
+
+def _ensure_ready():
+    """예열이 실패했으면 503 (예열 중이면 요청은 받고 워커에서 예열이 끝날 때까지 기다림)"""
+    if _warm_up is not None and _warm_up.done() and _warm_up.exception() is not None:
+        raise HTTPException(status_code=503, detail="워크플로우 예열에 실패했습니다. /readyz를 확인하세요.")
+
+
+def _wait_for_warm_up():
+    """워커 스레드에서 호출 - 예열 전에 실행하면 가짜 모델 대신 실제 클라이언트가 만들어질 수 있음"""
+    if _warm_up is not None:
+        _warm_up.result()
+
+
+# ========== 대화 ==========
+async def _acquire(lock: threading.Lock):
+    """
+    이벤트 루프를 막지 않고 세션 lock 획득 (같은 세션의 앞 질문이 끝날 때까지 짧게 폴링)
+    /chat/stream의 워커 스레드도 같은 lock을 쓰므로 asyncio.Lock 대신 threading.Lock을 그대로 사용합니다.
+    """
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(SESSION_LOCK_POLL)
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    """
+    질문 하나를 처리하여 최종 답변을 반환
+    queue_ms는 요청을 받은 뒤 실행을 시작하기까지 기다린 시간 (예열·같은 세션의 앞 질문 대기)
+    """
+    _ensure_ready()
+    session = sessions.get_or_create(request.session_id)
+    received = time.perf_counter()
+
+    async def run() -> Dict:
+        if _warm_up is not None:
+            await asyncio.shield(asyncio.wrap_future(_warm_up))
+        await _acquire(session.lock)
+        try:
+            queue_ms = round((time.perf_counter() - received) * 1000, 1)
+            memory = session.memory
+            result = await graph.aanswer_question(request.question, memory.to_history(), memory.last_retrieval)
+            result["queue_ms"] = queue_ms
+            # 검색 결과(조항 원문·임베딩)는 서버에만 보관하고 응답에는 넣지 않음
+            retrieval = result.pop("retrieval", None)
+            # 시간 초과로 취소되면 여기까지 오지 않으므로 응답하지 못한 답변은 대화 기록에 들어가지 않음
+            memory.add_exchange(request.question, result["answer"], retrieval)
+            return result
+        finally:
+            session.lock.release()
+
+    try:
+        # 시간 초과 시 실행 중인 LLM 호출까지 취소됨
+        result = await asyncio.wait_for(run(), SERVER_REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"{SERVER_REQUEST_TIMEOUT:.0f}초 안에 답변하지 못했습니다.")
+    except LLMOverloadedError as e:
+        # 동시 LLM 호출 대기열이 가득 참 - 클라이언트가 잠시 뒤 다시 시도하도록
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {e}")
+    return {"session_id": session.id, **result}
+
+
+def _sse(event: Dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def _stream_events(session, question: str) -> AsyncIterator[str]:
+    """stream_workflow 이벤트를 워커 스레드에서 받아 SSE로 전달"""
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            _wait_for_warm_up()
+            with session.lock:
+                memory = session.memory
+                stream = graph.stream_workflow(question, memory.to_history(), memory.last_retrieval)
+                # 시간 초과·연결 종료로 그만 받으면 스트림을 닫아 워크플로우 실행도 멈춘 뒤 워커를 돌려줌
+                with closing(stream):
+                    for event in stream:
+                        if cancelled.is_set():
+                            return
+                        if event["type"] == "done":
+                            retrieval = event.pop("retrieval", None)
+                            memory.add_exchange(question, event["answer"], retrieval)
+                            event = {**event, "session_id": session.id}
+                        loop.call_soon_threadsafe(events.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait, {"type": "error", "error": f"{type(e).__name__}: {e}"})
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    loop.run_in_executor(executor, produce)
+    deadline = loop.time() + SERVER_REQUEST_TIMEOUT
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                yield _sse({"type": "error", "error": f"{SERVER_REQUEST_TIMEOUT:.0f}초 안에 답변하지 못했습니다."})
+                return
+            if event is None:
+                return
+            yield _sse(event)
+    finally:
+        # 시간 초과·클라이언트 연결 종료 시 워커가 남은 이벤트를 버리고 풀을 비우도록
+        cancelled.set()
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    질문을 처리하면서 이벤트를 SSE로 전송 (event 이름은 stream_workflow의 이벤트 type)
+    progress / token / reset / done(session_id 포함) / error
+    """
+    _ensure_ready()
+    session = sessions.get_or_create(request.session_id)
+    return StreamingResponse(
+        _stream_events(session, request.question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session.id},
+    )
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """대화 기록 초기화"""
+    return {"deleted": sessions.delete(session_id)}
@@ -0,0 +1,78 @@
+"""
+ZIC-TALK HR 챗봇 - 대화 세션 저장소 (HTTP API용)
+세션 ID별로 대화 메모리를 서버에 보관하여, 클라이언트는 매번 질문만 보내면 됩니다.
+오래 사용하지 않은 세션은 TTL이 지나면 제거하고, 개수가 상한을 넘으면 가장 오래된 세션부터 제거합니다.
+(프로세스 메모리에 보관하므로 여러 서버를 띄울 때는 세션 ID 기준 sticky 라우팅이 필요합니다.)
+"""
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from conversation_memory import ConversationMemory
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+
+class Session:
+    """
+    대화 세션 하나
+
+    lock은 같은 세션의 질문을 한 번에 하나씩 처리하기 위한 것입니다.
+    (동시에 두 질문이 오면 뒤 질문은 앞 질문의 답변이 대화 기록에 반영된 뒤 실행)
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.memory = ConversationMemory()
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+
+class SessionStore:
+    """TTL + 개수 상한이 있는 세션 저장소 (스레드 안전)"""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        """만료된 세션과 상한을 넘는 세션을 제거 (lock 안에서 호출)"""
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.updated_at < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """
+        세션 조회 (없거나 만료되었으면 새로 생성)
+
+        session_id가 None이면 새 ID를 발급합니다. 클라이언트가 정한 ID(예: 메신저 사용자 ID)도 그대로 쓸 수 있습니다.
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(session_id or uuid.uuid4().hex)
+                self._sessions[session.id] = session
+            session.updated_at = now
+            self._sessions.move_to_end(session.id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """세션 삭제 (대화 초기화), 없던 세션이면 False"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._evict(time.time())
+            return {"sessions": len(self._sessions)}
@@ -0,0 +1,229 @@
+"""
+ZIC-TALK HR 챗봇 - 동일 질문 요청 합치기 (single-flight)
+출근 직후나 인사 공지 직후처럼 여러 직원이 거의 동시에 같은 첫 질문을 보내면,
+먼저 들어온 요청 하나만 워크플로우를 실행하고 나머지는 그 결과를 함께 받습니다.
+(실행이 끝나면 키를 지우므로, 이후 요청은 답변 캐시를 거쳐 새로 실행됩니다.)
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+
+class _Call:
+    """실행 중인 호출 하나 (결과 또는 예외를 기다리는 요청이 공유)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def add_done_callback(self, callback: Callable[[], None]):
+        """끝나면 callback() 호출 (이미 끝났으면 바로 호출)"""
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def finish(self):
+        with self._lock:
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class StreamCancelled(Exception):
+    """구독자가 모두 떠나 스트림 실행을 중단함 (publish()에서 발생)"""
+
+
+class EventBroadcast:
+    """
+    한 번 실행한 이벤트 스트림을 여러 구독자에게 전달
+    늦게 구독한 요청도 처음 이벤트부터 받으므로 모든 요청이 같은 순서의 이벤트를 봅니다.
+    구독자가 끝까지 받지 않고 모두 떠나면 cancel()되어, 다음 publish()에서 실행이 중단됩니다.
+    """
+
+    def __init__(self):
+        self._events: List[Any] = []
+        self.closed = False
+        self.cancelled = False
+        self.subscribers = 0  # SingleFlight의 lock 안에서 변경
+        self.thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+
+    def publish(self, event: Any):
+        with self._cond:
+            if self.cancelled:
+                raise StreamCancelled()
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify_all()
+
+    def events(self) -> Iterator[Any]:
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._events) and not self.closed:
+                    self._cond.wait()
+                if index >= len(self._events):
+                    return
+                event = self._events[index]
+            index += 1
+            yield event
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 한 번의 실행으로 합침 (스레드·이벤트 루프 공용)
+
+    - do(): 먼저 온 호출이 func()를 실행하고, 나머지는 끝날 때까지 기다려 같은 결과(또는 예외)를 받음
+    - ado(): do()의 비동기 버전 (같은 키의 do() 호출과도 합쳐짐, 기다리는 동안 스레드를 쓰지 않음,
+      먼저 온 요청이 취소되면 기다리던 요청 중 하나가 다시 실행)
+    - stream(): produce(publish)를 실행하면서 이벤트를 전달하고, 같은 키의 호출은 모두 이벤트를 처음부터 받음
+    key가 None이면 합치지 않고 바로 실행합니다. 공유한 결과는 읽기 전용으로 다뤄야 합니다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, EventBroadcast] = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # 다른 요청의 실행 결과를 받은 요청 수
+
+    def _join(self, key: str):
+        """(호출, 먼저 온 요청인지) - 실행 중인 호출이 없으면 새로 등록"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key: str, call: _Call):
+        with self._lock:
+            self._calls.pop(key, None)
+        call.finish()
+
+    def do(self, key: Optional[str], func: Callable[[], Any]) -> Any:
+        if key is None:
+            return func()
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return call.outcome()
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    async def ado(self, key: Optional[str], func: Callable[[], Awaitable[Any]]) -> Any:
+        if key is None:
+            return await func()
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            # 먼저 온 요청은 다른 스레드·이벤트 루프에서 실행 중일 수 있으므로
+            # 끝날 때 이 루프에 알려 달라고 등록하고 Future로 기다림 (executor 스레드를 점유하지 않음)
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+
+            def wake(waiter=waiter):
+                if not waiter.done():
+                    waiter.set_result(None)
+
+            def notify(loop=loop, wake=wake):
+                try:
+                    loop.call_soon_threadsafe(wake)
+                except RuntimeError:
+                    pass  # 기다리던 이벤트 루프가 이미 닫힘
+
+            call.add_done_callback(notify)
+            await waiter
+            # 먼저 온 요청이 취소(시간 초과·연결 종료)되어 결과가 없으면 이 요청이 다시 실행
+            if not isinstance(call.error, asyncio.CancelledError):
+                return call.outcome()
+        try:
+            call.result = await func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    def stream(self, key: Optional[str], produce: Callable[[Callable[[Any], None]], None]) -> Iterator[Any]:
+        """
+        produce(publish)를 실행 스레드에서 한 번만 실행하고 이벤트를 전달
+
+        실행은 구독자에게 묶여 있습니다. 구독자가 모두 끝까지 받지 않고 떠나면(이터레이터 close)
+        다음 publish()에서 StreamCancelled로 실행을 중단하고, 마지막으로 떠난 구독자가 실행이 끝날 때까지 기다립니다.
+        (합치지 않는 스트림도 같아서, 호출자가 떠난 뒤 실행이 혼자 남아 LLM을 호출하지 않음)
+        """
+        with self._lock:
+            broadcast = self._streams.get(key) if key is not None else None
+            leader = broadcast is None or broadcast.cancelled
+            if leader:
+                broadcast = EventBroadcast()
+                if key is not None:
+                    self._streams[key] = broadcast
+            else:
+                self.shared += 1
+            broadcast.subscribers += 1
+
+        if leader:
+            def run():
+                try:
+                    produce(broadcast.publish)
+                except StreamCancelled:
+                    pass
+                finally:
+                    if key is not None:
+                        with self._lock:
+                            if self._streams.get(key) is broadcast:
+                                self._streams.pop(key)
+                    broadcast.close()
+
+            broadcast.thread = threading.Thread(target=run, daemon=True)
+            broadcast.thread.start()
+        return self._subscribe(key, broadcast)
+
+    def _subscribe(self, key: Optional[str], broadcast: EventBroadcast) -> Iterator[Any]:
+        try:
+            yield from broadcast.events()
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                abandoned = broadcast.subscribers == 0 and not broadcast.closed
+                if abandoned:
+                    broadcast.cancel()
+                    # 이후 같은 질문은 중단된 실행에 붙지 않고 새로 실행
+                    if key is not None and self._streams.get(key) is broadcast:
+                        self._streams.pop(key)
+            if abandoned:
+                broadcast.thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._calls) + len(self._streams), "shared": self.shared}
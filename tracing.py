@@ -0,0 +1,194 @@
+"""
+ZIC-TALK HR 챗봇 - 워크플로우 트레이싱
+노드별 소요 시간, LLM 토큰 사용량, 검색 지연, 수정 횟수, 최종 평가를 기록하여
+회전(rotating) JSONL 파일로 남기고, 노드별 p50/p95 지연을 실시간으로 집계합니다.
+"""
+import os
+import json
+import time
+import uuid
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("logs", "trace.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "500"))
+
+# 현재 실행 중인 노드 구간 (노드 안의 LLM 호출이 토큰 사용량을 기록하는 곳)
+_current_span: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """정렬된 값 목록의 q 분위수 (선형 보간)"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class Tracer:
+    """
+    질문 1건 = 트레이스 1건, 노드 실행 1회 = 구간(span) 1개
+
+    LangGraph는 노드를 별도 스레드에서 실행하므로, 트레이스는 state["trace_id"]로
+    찾아가고, 노드 안의 토큰 기록은 contextvar로 현재 구간에 붙입니다.
+    """
+
+    def __init__(self, path: str = TRACE_FILE, window: int = TRACE_WINDOW):
+        self.path = path
+        self.window = window
+        self._runs: Dict[str, Dict] = {}
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        self._listeners: List[Callable[[Dict], None]] = []
+
+    def _get_logger(self):
+        """트레이스 파일 로거 (처음 기록할 때 생성)"""
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            logger = logging.getLogger(f"zic_talk.trace.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(
+                self.path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    # ---------- 트레이스 ----------
+    def start_run(self, question: str) -> str:
+        trace_id = uuid.uuid4().hex
+        with self._lock:
+            self._runs[trace_id] = {
+                "trace_id": trace_id,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "question": question,
+                "started": time.perf_counter(),
+                "nodes": [],
+            }
+        return trace_id
+
+    def finish_run(self, trace_id: str, result: Optional[Dict] = None, error: Optional[BaseException] = None):
+        """트레이스를 마무리하여 JSONL 한 줄로 기록"""
+        with self._lock:
+            run = self._runs.pop(trace_id, None)
+            if run is None:
+                return
+            started = run.pop("started")
+            run["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._add_latency("total", run["total_ms"])
+
+        nodes = run["nodes"]
+        run["prompt_tokens"] = sum(span.get("prompt_tokens", 0) for span in nodes)
+        run["completion_tokens"] = sum(span.get("completion_tokens", 0) for span in nodes)
+        run["llm_calls"] = sum(span.get("llm_calls", 0) for span in nodes)
+        if result is not None:
+            run["revision_count"] = result.get("revision_count", 0)
+            run["grade"] = result.get("grade", "")
+            run["cache_hit"] = result.get("cache_hit", False)
+            run["route"] = result.get("route", "")
+        if error is not None:
+            run["error"] = f"{type(error).__name__}: {error}"
+
+        try:
+            self._get_logger().info(json.dumps(run, ensure_ascii=False))
+        except OSError as e:
+            print(f"⚠️  트레이스 기록 실패: {e}")
+
+        for listener in list(self._listeners):
+            listener(run)
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """완료된 트레이스를 받아볼 콜백 등록 (벤치마크 집계 등)"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ---------- 구간 ----------
+    def _add_latency(self, node: str, ms: float):
+        """롤링 윈도우에 지연 시간 추가 (lock 안에서 호출)"""
+        if node not in self._latencies:
+            self._latencies[node] = deque(maxlen=self.window)
+        self._latencies[node].append(ms)
+
+    def _close_span(self, trace_id: Optional[str], span: Dict, started: float):
+        span["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            self._add_latency(span["node"], span["ms"])
+            run = self._runs.get(trace_id)
+            if run is not None:
+                run["nodes"].append(span)
+
+    def traced(self, node: str, func: Callable) -> Callable:
+        """노드 함수를 감싸 실행 시간과 토큰 사용량을 기록 (동기/비동기 모두 지원)"""
+        accepts_config = "config" in inspect.signature(func).parameters
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(state, config=None):
+                span = {"node": node}
+                token = _current_span.set(span)
+                started = time.perf_counter()
+                try:
+                    return await (func(state, config) if accepts_config else func(state))
+                finally:
+                    _current_span.reset(token)
+                    self._close_span(state.get("trace_id"), span, started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(state, config=None):
+            span = {"node": node}
+            token = _current_span.set(span)
+            started = time.perf_counter()
+            try:
+                return func(state, config) if accepts_config else func(state)
+            finally:
+                _current_span.reset(token)
+                self._close_span(state.get("trace_id"), span, started)
+        return wrapper
+
+    # ---------- 집계 ----------
+    def latency_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """노드별 최근 지연 시간 p50/p95 (ms)"""
+        with self._lock:
+            snapshot = {node: sorted(values) for node, values in self._latencies.items()}
+        return {
+            node: {"p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95), "count": len(values)}
+            for node, values in snapshot.items()
+        }
+
+
+def record(**fields):
+    """현재 노드 구간에 값을 기록 (숫자는 누적)"""
+    span = _current_span.get()
+    if span is None:
+        return
+    for key, value in fields.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and key in span:
+            span[key] += value
+        else:
+            span[key] = value
+
+
+def record_llm_usage(response=None, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """LLM 응답의 토큰 사용량을 현재 구간에 기록 (스트리밍은 직접 넘긴 값 사용)"""
+    if response is not None:
+        usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", prompt_tokens)
+        completion_tokens = usage.get("completion_tokens", completion_tokens)
+    record(llm_calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)